@@ -1,22 +1,18 @@
-import pandas as pd
-import warnings
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.worksheet.page import PageMargins
-from openpyxl.worksheet.properties import WorksheetProperties, PageSetupProperties
 from datetime import datetime
-import calendar
 import os
 from tkinter import *
 from tkinter import filedialog, messagebox
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 import threading
-import shutil
 import sys
 import subprocess
 from Product_Classification_Tool import ProductClassificationApp
+import multiprocessing
+import recon_engine
+import grouping
+from statement_pipeline import StatementConfig, StatementPipeline
+from ui_events import UIEventBus
 
 # 版本号
 VERSION = '2.0.6'
@@ -24,6 +20,8 @@ VERSION = '2.0.6'
 class BldBuyApp:
     def __init__(self, root):
         self.root = root
+        # 处理线程通过事件队列更新日志和进度，由主线程定时显示
+        self.events = UIEventBus(self.root, self.show_log_messages, self.show_progress)
         self.root.title(f"供应商对账工具集 v{VERSION} - Powered By Cayman Fu @ Sofitel HAIKOU")
         
         # 设置窗口图标
@@ -45,13 +43,6 @@ class BldBuyApp:
         
         # 检查并确保配置文件存在
         self.ensure_config_file()
-            
-        # 定义期望的表头字段
-        self.expected_headers = [
-            "收货日期", "订单号", "商品名称", "实收数量", "基本单位",
-            "单价(结算)", "小计金额(结算)", "税额(结算)", "小计价税(结算)", "部门",
-            "税率", "供应商/备用金报销账户","商品分类"
-        ]
         
         # 创建主框架
         self.main_frame = ttk.Frame(root, padding="10")
@@ -245,15 +236,69 @@ Sheet_tittle:供货明细表'''
         self.group_frame = ttk.Frame(control_frame)
         self.group_frame.pack(fill=X, pady=5)
         
-        # 添加分组选项选择框
-        self.group_by_tax_rate_var = BooleanVar(value=False)
-        self.group_checkbox = ttk.Checkbutton(
-            self.group_frame, 
-            text="按税率生成明细",
-            variable=self.group_by_tax_rate_var,
+        # 添加分组方式选择框
+        ttk.Label(self.group_frame, text="分组方式：").pack(side=LEFT, padx=5)
+        self.group_mode_var = StringVar(value=grouping.DEFAULT_GROUP_MODE)
+        self.group_mode_combobox = ttk.Combobox(
+            self.group_frame,
+            textvariable=self.group_mode_var,
+            values=list(grouping.GROUP_MODES),
+            state='readonly',
+            width=14
+        )
+        self.group_mode_combobox.pack(side=LEFT, padx=5)
+        
+        # 添加跳过缓存选项
+        self.bypass_cache_var = BooleanVar(value=False)
+        self.cache_checkbox = ttk.Checkbutton(
+            self.group_frame,
+            text="跳过缓存（重新读取文件）",
+            variable=self.bypass_cache_var,
+            bootstyle=INFO
+        )
+        self.cache_checkbox.pack(side=LEFT, padx=5)
+        
+        # 添加大文件分区处理选项
+        self.partitioned_var = BooleanVar(value=False)
+        self.partitioned_checkbox = ttk.Checkbutton(
+            self.group_frame,
+            text="大文件分区处理（节省内存）",
+            variable=self.partitioned_var,
+            bootstyle=INFO
+        )
+        self.partitioned_checkbox.pack(side=LEFT, padx=5)
+        
+        # 添加合并同月文件选项
+        self.merge_var = BooleanVar(value=False)
+        self.merge_checkbox = ttk.Checkbutton(
+            self.group_frame,
+            text="合并同月文件",
+            variable=self.merge_var,
+            bootstyle=INFO
+        )
+        self.merge_checkbox.pack(side=LEFT, padx=5)
+        
+        # 添加重新生成全部对账单选项（默认只生成内容有变化的对账单）
+        self.force_var = BooleanVar(value=False)
+        self.force_checkbox = ttk.Checkbutton(
+            self.group_frame,
+            text="重新生成全部对账单",
+            variable=self.force_var,
             bootstyle=INFO
         )
-        self.group_checkbox.pack(side=LEFT, padx=5)
+        self.force_checkbox.pack(side=LEFT, padx=5)
+        
+        # 添加并行进程数选项，默认为CPU核心数
+        ttk.Label(self.group_frame, text="并行进程数：").pack(side=LEFT, padx=(15, 5))
+        self.workers_var = IntVar(value=recon_engine.default_workers())
+        self.workers_spinbox = ttk.Spinbox(
+            self.group_frame,
+            from_=1,
+            to=recon_engine.default_workers(),
+            textvariable=self.workers_var,
+            width=4
+        )
+        self.workers_spinbox.pack(side=LEFT)
         
         # 处理按钮
         self.process_btn = ttk.Button(control_frame, text="开始处理", command=self.start_processing, bootstyle=SUCCESS)
@@ -278,20 +323,26 @@ Sheet_tittle:供货明细表'''
             self.input_file_var.set("\n".join(file_paths))  # 用换行符分隔多个文件路径
             
     def log_message(self, message):
-        """修改后的日志记录方法"""
+        """记录日志，可以在处理线程中调用，由主线程批量显示"""
         # 将消息添加到日志列表
         self.log_messages.append(message)
+        self.events.log(message)
         
-        # 实时显示日志
+    def show_log_messages(self, messages):
+        """在主线程中显示一批日志，警告显示为红色"""
         self.log_text.config(state=NORMAL)
-        if message.startswith("警告："):
-            self.log_text.tag_config("warning", foreground="red")
-            self.log_text.insert(END, message + "\n", "warning")
-        else:
-            self.log_text.insert(END, message + "\n")
+        self.log_text.tag_config("warning", foreground="red")
+        for message, tag in messages:
+            if tag is None and message.startswith("警告："):
+                tag = "warning"
+            self.log_text.insert(END, message + "\n", tag or ())
         self.log_text.see(END)
         self.log_text.config(state=DISABLED)
         
+    def show_progress(self, value):
+        """在主线程中更新进度条"""
+        self.progress['value'] = value
+        
     def start_processing(self):
         if self.processing:
             return
@@ -299,7 +350,12 @@ Sheet_tittle:供货明细表'''
         self.processing = True
         # 禁用所有按钮
         self.process_btn.config(state=DISABLED)
-        self.group_checkbox.config(state=DISABLED)
+        self.group_mode_combobox.config(state=DISABLED)
+        self.cache_checkbox.config(state=DISABLED)
+        self.partitioned_checkbox.config(state=DISABLED)
+        self.merge_checkbox.config(state=DISABLED)
+        self.force_checkbox.config(state=DISABLED)
+        self.workers_spinbox.config(state=DISABLED)
         for widget in self.file_frame.winfo_children():
             if isinstance(widget, ttk.Button):
                 widget.config(state=DISABLED)
@@ -313,290 +369,69 @@ Sheet_tittle:供货明细表'''
         self.log_messages = []
         
         # 重置进度条并显示准备状态
-        self.progress['value'] = 0
         self.progress.config(mode='determinate')
-        self.root.update_idletasks()
+        self.events.progress(0)
         
         self.log_message("开始处理文件...")
         
+        # 在主线程中读取界面上的设置，处理线程不访问Tk变量
+        input_files = [f for f in self.input_file_var.get().split("\n") if f]
+        config = StatementConfig(
+            group_mode=self.group_mode_var.get(),
+            workers=self.get_worker_count(),
+            bypass_cache=self.bypass_cache_var.get(),
+            partitioned=self.partitioned_var.get(),
+            merge=self.merge_var.get(),
+            force=self.force_var.get(),
+            config_file=self.get_config_path()
+        )
+        
         # 使用线程处理，避免界面卡顿
-        threading.Thread(target=self.process_files, daemon=True).start()
+        threading.Thread(target=self.process_files, args=(config, input_files), daemon=True).start()
         
-    def preprocess_excel(self, file_path):
-        """预处理Excel文件，自动搜索表头位置"""
+    def get_worker_count(self):
+        """获取并行进程数，输入无效时使用CPU核心数"""
         try:
-            # 自动搜索表头位置
-            header_row = self.find_header_row(file_path)
-            
-            # 使用找到的表头行读取数据
-            df = pd.read_excel(file_path, skiprows=header_row)
-            
-            # 添加需要保留的退货相关列，排除N-R列数据
-            required_columns = self.expected_headers + ['退货', '合计退货数量', '退货合计金额(结算)', '退货合计税额(结算)', '退货合计价税(结算)']
-            
-            # 过滤并重新排列列，排除N-R列的数据
-            exclude_columns = df.iloc[:, 13:17].columns.tolist()  # N-R列的索引是13-17
-            df = df.drop(columns=exclude_columns, errors='ignore')
-            
-            # 过滤并保留所需列
-            df_filtered = df.reindex(columns=[col if col != '单位' else '基本单位' for col in required_columns if col in df.columns or col == '基本单位'])
-            
-            # 检查是否找到了必要的列
-            missing_columns = [col for col in self.expected_headers if col not in df_filtered.columns]
-            if missing_columns:
-                self.log_message(f"警告：文件中缺少必要的列：{', '.join(missing_columns)}，请检查是否选择了正确的文件")
-                return None
-            
-            # 处理收货日期，去掉时间部分
-            if '收货日期' in df_filtered.columns:
-                df_filtered['收货日期'] = pd.to_datetime(df_filtered['收货日期'], errors='coerce').dt.strftime('%Y-%m-%d')
-            
-            return df_filtered.dropna(how='all')
-        except Exception as e:
-            self.log_message(f"警告：处理文件时出错，请检查是否选择了正确的文件。错误信息：{str(e)}")
-            return None
-        
-    def find_header_row(self, file_path):
-        """自动搜索Excel文件中的表头行"""
-        # 最大搜索行数
-        max_rows = 50
-        
-        # 读取前max_rows行来查找表头
-        sample_df = pd.read_excel(file_path, nrows=max_rows, header=None)
-        
-        # 定义匹配度阈值（至少需要匹配的表头数量）
-        min_match_threshold = 3
-        
-        # 遍历每一行，检查是否包含足够多的预期表头
-        for i in range(max_rows):
-            row = sample_df.iloc[i].astype(str)
-            # 计算当前行与预期表头的匹配数量
-            matches = sum(1 for header in self.expected_headers if any(header in str(cell) for cell in row))
-            
-            # 如果匹配数量超过阈值，认为找到了表头行
-            if matches >= min_match_threshold:
-                self.log_message(f"找到表头行: 第{i+1}行，匹配度: {matches}/{len(self.expected_headers)}")
-                return i
-        
-        # 如果没有找到，使用默认值
-        self.log_message("未找到表头行，使用默认值(35)")
-        return 35
-        
-    def process_files(self):
-        import time
-        start_time = time.time()
+            return max(1, int(self.workers_var.get()))
+        except (TclError, ValueError):
+            return recon_engine.default_workers()
         
+    def process_files(self, config, input_files):
+        """在处理线程中运行对账单生成流程，日志和进度通过事件队列显示"""
         try:
-            # 初始化文件夹
-            folders = {
-                'output': "export",
-                'archive': "archive"
-            }
-            
-            # 获取输入文件列表
-            input_files = [f for f in self.input_file_var.get().split("\n") if f]
             if not input_files:
                 self.log_message("请先选择要处理的Excel文件")
                 return
             
-            # 创建必要的文件夹
-            for folder in folders.values():
-                os.makedirs(folder, exist_ok=True)
-            
-            # 获取配置信息
-            header_rows = self.get_config_header_rows()
-            
-            # 批量处理文件
-            total_files = len(input_files)
-            self.current_file_index = 0
-            self.total_files = total_files
-            
-            self.log_message(f"开始批量处理 {total_files} 个文件...")
-            
-            for index, input_file in enumerate(input_files, 1):
-                try:
-                    self.current_file_index = index
-                    self.log_message(f"\n[{index}/{total_files}] 正在处理: {os.path.basename(input_file)}")
-                    base_progress = int(((index - 1) / total_files) * 100)
-                    self.progress['value'] = base_progress
-                    self.root.update_idletasks()
-                    df_filtered = self.preprocess_excel(input_file)
-                    if df_filtered is None:  # 预处理失败
-                        continue
-                    
-                    # 获取年月信息
-                    year_month = self.get_year_month(df_filtered)
-                    if not year_month:
-                        self.log_message("错误：无法从文件中获取有效的收货日期，请检查是否选择了正确的文件。")
-                        continue
-                    
-                    # 创建年月文件夹
-                    year_month_folder = os.path.join(folders['output'], year_month)
-                    os.makedirs(year_month_folder, exist_ok=True)
-                    
-                    # 分组并处理数据（带进度更新）
-                    self.process_grouped_data(df_filtered, year_month, year_month_folder, header_rows)
-                    
-                    # 归档文件
-                    self.log_message(f"  → 归档原文件")
-                    self.archive_file(input_file, folders['archive'])
-                    
-                    # 更新完整进度
-                    self.update_progress(index, total_files)
-                    
-                except Exception as e:
-                    self.log_message(f"✗ 处理文件 {os.path.basename(input_file)} 时出错: {str(e)}")
-            
-            # 计算处理时间
-            end_time = time.time()
-            processing_time = end_time - start_time
-            self.log_message(f"\n处理完成！总耗时: {processing_time:.2f} 秒")
-            
-            # 确保进度条显示100%
-            self.progress['value'] = 100
-            self.root.update_idletasks()
+            pipeline = StatementPipeline(config, log=self.log_message, progress=self.events.progress)
+            pipeline.run(input_files)
             
             # 显示处理结果
-            self.show_processing_results(folders['output'])
+            self.show_processing_results(config.output_folder)
             
         except Exception as e:
             self.log_message(f"处理过程中发生错误: {str(e)}")
         finally:
-            self.processing = False
-            # 恢复所有按钮状态
-            self.process_btn.config(state=NORMAL)
-            self.group_checkbox.config(state=NORMAL)
-            for widget in self.file_frame.winfo_children():
-                if isinstance(widget, ttk.Button):
-                    widget.config(state=NORMAL)
-            # 重新启用所有左侧按钮
-            for btn, text in self.left_buttons:
-                btn.config(state=NORMAL)
-            
-    def get_config_header_rows(self):
-        """获取配置文件中的标题信息"""
-        try:
-            application_path = os.path.dirname(sys.executable if getattr(sys, 'frozen', False) 
-                                              else os.path.abspath(__file__))
-            config_file = os.path.join(application_path, 'config.txt')
-            
-            if not os.path.exists(config_file):
-                self.log_message("警告：未找到config.txt文件,将会导致对账单标题错误")
-                return []
-            
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = dict(line.split(':', 1) for line in f if ':' in line)
-            
-            hotelname = config.get('hotelname', '').strip()
-            sheet_title = config.get('Sheet_tittle', '').strip()
-            
-            return [
-                [''] * 5 + [hotelname] + [''] * 7,
-                [''] * 5 + [sheet_title] + [''] * 7,
-                [''] * 13,
-                [''] * 13,
-                [''] * 13
-            ]
-        except Exception as e:
-            self.log_message(f"读取配置文件时出错: {str(e)}")
-            return []
-            
-    def get_year_month(self, df):
-        """从数据中获取年月信息"""
-        if '收货日期' not in df.columns:
-            self.log_message("错误：文件中缺少收货日期列，请检查是否选择了正确的文件。")
-            return None
-            
-        try:
-            # 检查收货日期列是否有数据
-            if df['收货日期'].empty or df['收货日期'].isna().all():
-                self.log_message("错误：文件中的收货日期列没有任何数据，请检查是否选择了正确的文件。")
-                return None
-                
-            earliest_date = df['收货日期'].min()
-            if not earliest_date or pd.isna(earliest_date):
-                self.log_message("错误：文件中没有有效的收货日期，请检查是否选择了正确的文件。")
-                return None
-                
-            try:
-                return datetime.strptime(earliest_date, '%Y-%m-%d').strftime('%Y-%m')
-            except ValueError:
-                self.log_message("错误：收货日期格式不正确，请检查是否选择了正确的文件。")
-                return None
-        except Exception as e:
-            self.log_message(f"错误：处理收货日期时出错，请检查是否选择了正确的文件。错误信息：{str(e)}")
-            return None
-            
-    def process_grouped_data(self, df, year_month, year_month_folder, header_rows):
-        """处理分组数据"""
-        # 排序和分组
-        sort_columns = ['收货日期', '税率']
-        if all(col in df.columns for col in sort_columns):
-            df = df.sort_values(by=sort_columns)
-        else:
-            self.log_message("警告：文件中缺少排序所需的列，将不按顺序处理数据。")
-        
-        # 根据选择框状态决定分组方式
-        if self.group_by_tax_rate_var.get():
-            groups = list(df.groupby(['供应商/备用金报销账户', '税率'], as_index=False))
-            total_groups = len(groups)
-            self.log_message(f"共 {total_groups} 个供应商-税率组合")
+            # 恢复按钮状态需要在主线程中进行
+            self.events.call(self.finish_processing)
             
-            for group_index, (group_key, group_data) in enumerate(groups, 1):
-                supplier_name, tax_rate = group_key
-                self.update_detailed_progress(group_index, total_groups)
-                self.process_group_data_with_tax_rate(supplier_name, tax_rate, group_data, year_month, year_month_folder, header_rows)
-        else:
-            groups = list(df.groupby(['供应商/备用金报销账户'], as_index=False))
-            total_groups = len(groups)
-            self.log_message(f"共 {total_groups} 个供应商")
-            
-            for group_index, (group_name, group_data) in enumerate(groups, 1):
-                self.update_detailed_progress(group_index, total_groups)
-                self.process_group_data(group_name, group_data, year_month, year_month_folder, header_rows)
-            
-    def archive_file(self, input_file, archive_folder):
-        """归档处理完的文件"""
-        try:
-            base_name = os.path.basename(input_file)
-            archive_path = os.path.join(archive_folder, base_name)
-            
-            # 如果文件已存在，添加时间戳
-            if os.path.exists(archive_path):
-                base, ext = os.path.splitext(base_name)
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                archive_path = os.path.join(archive_folder, f"{base}_{timestamp}{ext}")
-            
-            shutil.move(input_file, archive_path)
-            self.log_message(f"已成功归档文件 {base_name}")
-        except Exception as e:
-            self.log_message(f"归档文件时出错: {str(e)}")
-            
-    def update_progress(self, current, total):
-        """更新进度条（文件级别）"""
-        progress_value = int((current / total) * 100)
-        self.progress['value'] = progress_value
-        self.root.update_idletasks()
-        
-    def update_detailed_progress(self, current_group, total_groups):
-        """更新详细进度条（分组级别）"""
-        if not hasattr(self, 'current_file_index') or not hasattr(self, 'total_files'):
-            return
-            
-        # 计算当前文件的基础进度
-        file_base_progress = ((self.current_file_index - 1) / self.total_files) * 100
-        
-        # 计算当前文件内的分组进度
-        group_progress = (current_group / total_groups) * (100 / self.total_files)
-        
-        # 总进度 = 已完成文件的进度 + 当前文件内的进度
-        total_progress = file_base_progress + group_progress
-        
-        # 确保进度不超过100%
-        total_progress = min(total_progress, 100)
-        
-        self.progress['value'] = int(total_progress)
-        self.root.update_idletasks()
+    def finish_processing(self):
+        """处理结束后恢复所有按钮状态"""
+        self.processing = False
+        # 恢复所有按钮状态
+        self.process_btn.config(state=NORMAL)
+        self.group_mode_combobox.config(state='readonly')
+        self.cache_checkbox.config(state=NORMAL)
+        self.partitioned_checkbox.config(state=NORMAL)
+        self.merge_checkbox.config(state=NORMAL)
+        self.force_checkbox.config(state=NORMAL)
+        self.workers_spinbox.config(state=NORMAL)
+        for widget in self.file_frame.winfo_children():
+            if isinstance(widget, ttk.Button):
+                widget.config(state=NORMAL)
+        # 重新启用所有左侧按钮
+        for btn, text in self.left_buttons:
+            btn.config(state=NORMAL)
         
     def show_processing_results(self, output_folder):
         """显示处理结果和警告信息"""
@@ -606,29 +441,27 @@ Sheet_tittle:供货明细表'''
         
         if error_messages:
             self.log_message("\n处理过程中出现以下错误：")
-            self.log_text.config(state=NORMAL)
             for msg in error_messages:
-                self.log_text.insert(END, msg + "\n", "warning")
-            self.log_text.see(END)
-            self.log_text.config(state=DISABLED)
+                self.events.log(msg, "warning")
             
             # 如果有错误，不显示成功完成的消息
-            self.progress['value'] = 100
+            self.events.progress(100)
             return
             
         if warning_messages:
             self.log_message("\n所有文件处理完成。以下是处理过程中的警告信息：")
-            self.log_text.config(state=NORMAL)
             for msg in warning_messages:
-                self.log_text.insert(END, msg + "\n", "warning")
-            self.log_text.see(END)
-            self.log_text.config(state=DISABLED)
+                self.events.log(msg, "warning")
         else:
             self.log_message("\n所有文件处理完成，没有发现警告信息。")
         
-        self.progress['value'] = 100
+        self.events.progress(100)
         
-        # 只有在没有错误时才询问是否打开输出目录
+        # 只有在没有错误时才询问是否打开输出目录（对话框在主线程中显示）
+        self.events.call(self.ask_open_output_folder, output_folder)
+        
+    def ask_open_output_folder(self, output_folder):
+        """询问是否打开输出目录"""
         if messagebox.askyesno("处理完成", "所有文件处理已完成，是否打开输出文件夹？"):
             try:
                 if sys.platform == "darwin":  # macOS
@@ -641,395 +474,6 @@ Sheet_tittle:供货明细表'''
                 self.log_message("无法打开文件夹，请手动访问：")
                 self.log_message(output_folder)
             
-    def process_group_data(self, group_name, group_data, year_month, year_month_folder, header_rows):
-        """处理每个分组的数据"""
-        supplier_account = group_name
-        
-        try:
-            df_processed, output_filepath = self.prepare_group_data(group_name, group_data, year_month, year_month_folder)
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Statement"
-            self.write_excel_content(ws, df_processed, group_data, header_rows)
-            self.apply_styles(ws)
-            wb.save(output_filepath)
-            self.log_message(f"✓ {os.path.basename(output_filepath)}")
-            
-        except Exception as e:
-            self.log_message(f"✗ 处理供应商 {supplier_account} 的数据时出错: {str(e)}")
-    
-    def process_group_data_with_tax_rate(self, supplier_name, tax_rate, group_data, year_month, year_month_folder, header_rows):
-        """处理按供应商和税率分组的数据"""
-        try:
-            # 预处理数据，使用包含税率的文件名
-            self.log_message(f"  → 预处理数据: {len(group_data)} 条记录")
-            df_processed, output_filepath = self.prepare_group_data_with_tax_rate(supplier_name, tax_rate, group_data, year_month, year_month_folder)
-            
-            # 创建工作簿和工作表
-            self.log_message(f"  → 创建Excel工作簿")
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Statement"
-            
-            # 写入数据
-            self.log_message(f"  → 写入数据到Excel")
-            self.write_excel_content(ws, df_processed, group_data, header_rows)
-            
-            # 设置样式并保存
-            self.log_message(f"  → 应用样式并保存文件")
-            self.apply_styles(ws)
-            wb.save(output_filepath)
-            
-            self.log_message(f"✓ 已成功创建 {os.path.basename(output_filepath)}")
-            
-        except Exception as e:
-            self.log_message(f"✗ 处理供应商 {supplier_name} (税率: {tax_rate}) 的数据时出错: {str(e)}")
-    
-    def prepare_group_data(self, group_name, group_data, year_month, year_month_folder):
-        """准备分组数据"""
-        # 检查跨月
-        group_data['收货日期'] = pd.to_datetime(group_data['收货日期'], errors='coerce').dt.strftime('%Y-%m-%d')
-        unique_months = pd.to_datetime(group_data['收货日期']).dt.strftime('%Y-%m').unique()
-        if len(unique_months) > 1:
-            self.log_message(f"警告：供应商 {group_name} 的收货日期包含跨月数据，请核查。包含的月份有：{', '.join(unique_months)}")
-        
-        # 预处理数据
-        df_processed = group_data.reindex(columns=self.expected_headers).fillna('')
-        df_processed['税率'] = df_processed['税率'].apply(lambda x: f"{int(float(x) * 100)}%" if pd.notna(x) else '0%')
-        
-        # 处理退货数据：将退货金额转换为负数
-        if '退货' in group_data.columns:
-            return_mask = (group_data['退货'] == '是')
-            amount_columns = ['单价(结算)', '小计金额(结算)', '税额(结算)', '小计价税(结算)']
-            
-            for col in amount_columns:
-                if col in df_processed.columns:
-                    # 将退货行的金额列转换为负数
-                    df_processed.loc[return_mask, col] = df_processed.loc[return_mask, col].apply(
-                        lambda x: -abs(float(x)) if pd.notna(x) and str(x).replace('.', '').replace('-', '').isdigit() else x
-                    )
-        
-        # 构建文件路径
-        sanitized_name = ''.join([c if c.isalnum() or c in (' ', '.') else '_' for c in str(group_name)]).strip('_')
-        output_filepath = os.path.join(year_month_folder, f"{year_month}_{sanitized_name}.xlsx")
-        
-        return df_processed, output_filepath
-    
-    def prepare_group_data_with_tax_rate(self, supplier_name, tax_rate, group_data, year_month, year_month_folder):
-        """准备按供应商和税率分组的数据"""
-        # 检查跨月
-        group_data['收货日期'] = pd.to_datetime(group_data['收货日期'], errors='coerce').dt.strftime('%Y-%m-%d')
-        unique_months = pd.to_datetime(group_data['收货日期']).dt.strftime('%Y-%m').unique()
-        if len(unique_months) > 1:
-            self.log_message(f"警告：供应商 {supplier_name} (税率: {tax_rate}) 的收货日期包含跨月数据，请核查。包含的月份有：{', '.join(unique_months)}")
-        
-        # 预处理数据
-        df_processed = group_data.reindex(columns=self.expected_headers).fillna('')
-        df_processed['税率'] = df_processed['税率'].apply(lambda x: f"{int(float(x) * 100)}%" if pd.notna(x) else '0%')
-        
-        # 处理退货数据：将退货金额转换为负数
-        if '退货' in group_data.columns:
-            return_mask = (group_data['退货'] == '是')
-            amount_columns = ['单价(结算)', '小计金额(结算)', '税额(结算)', '小计价税(结算)']
-            
-            for col in amount_columns:
-                if col in df_processed.columns:
-                    # 将退货行的金额列转换为负数
-                    df_processed.loc[return_mask, col] = df_processed.loc[return_mask, col].apply(
-                        lambda x: -abs(float(x)) if pd.notna(x) and str(x).replace('.', '').replace('-', '').isdigit() else x
-                    )
-        
-        # 构建包含税率信息的文件路径
-        sanitized_supplier_name = ''.join([c if c.isalnum() or c in (' ', '.') else '_' for c in str(supplier_name)]).strip('_')
-        # 将税率转换为百分比格式用于文件名
-        tax_rate_percent = f"{int(float(tax_rate) * 100)}%" if pd.notna(tax_rate) else '0%'
-        sanitized_tax_rate = ''.join([c if c.isalnum() or c in (' ', '.') else '_' for c in str(tax_rate_percent)]).strip('_')
-        output_filepath = os.path.join(year_month_folder, f"{year_month}_{sanitized_supplier_name}_{sanitized_tax_rate}.xlsx")
-        
-        return df_processed, output_filepath
-    
-    def write_excel_content(self, ws, df_processed, group_data, header_rows):
-        """写入Excel内容"""
-        # 写入表头
-        for row in header_rows + [self.expected_headers]:
-            ws.append(row)
-        
-        # 写入数据行（包括已处理的退货负数数据）
-        for i, row in enumerate(df_processed.values.tolist()):
-            ws.append(row)
-        
-        # 添加合计行
-        self.add_total_row(ws, df_processed)
-        
-        # 填入固定文字
-        ws['A3'] = '供应商名称：'
-        ws['A4'] = '对账周期：'
-        ws['C3'] = '小计金额(结算)：'
-        ws['C4'] = '税额(结算)：'
-        ws['C5'] = '小计价税(结算)：'
-        
-        # 填入数据
-        supplier_name = df_processed['供应商/备用金报销账户'].iloc[0] if not df_processed.empty else ''
-        ws['B3'] = supplier_name
-        
-        # 提取年月并格式化为日期范围
-        dates = pd.to_datetime(df_processed['收货日期'])
-        if not dates.empty:
-            min_date = dates.min()
-            year = min_date.year
-            month = min_date.month
-            # 获取该月的最后一天
-            last_day = calendar.monthrange(year, month)[1]
-            # 格式化为"YYYY-MM-01 - YYYY-MM-31"格式
-            date_range = f"{year}-{month:02d}-01 至 {year}-{month:02d}-{last_day:02d}"
-            ws['B4'] = date_range
-        
-        # 计算包含退货负数的合计数据
-        total_subtotal = df_processed['小计金额(结算)'].astype(float).sum()
-        total_tax = df_processed['税额(结算)'].astype(float).sum()
-        total_amount = df_processed['小计价税(结算)'].astype(float).sum()
-        
-        # 如果有退货数据，需要额外计算退货部分的负数
-        if '退货' in group_data.columns:
-            return_mask = (group_data['退货'] == '是')
-            if return_mask.any():
-                return_data = group_data[return_mask]
-                # 退货金额已经在 prepare_group_data 中转换为负数，这里直接使用
-                pass
-        
-        # 填入合计数据
-        ws['D3'] = '{:.2f}'.format(total_subtotal)
-        ws['D4'] = '{:.2f}'.format(total_tax)
-        ws['D5'] = '{:.2f}'.format(total_amount)
-        
-        # 设置单元格对齐方式
-        # A3A4右对齐
-        ws['A3'].alignment = Alignment(horizontal="right", vertical="center")
-        ws['A4'].alignment = Alignment(horizontal="right", vertical="center")
-        
-        # B3B4左对齐
-        ws['B3'].alignment = Alignment(horizontal="left", vertical="center")
-        ws['B4'].alignment = Alignment(horizontal="left", vertical="center")
-        
-        # C3C4C5右对齐
-        ws['C3'].alignment = Alignment(horizontal="right", vertical="center")
-        ws['C4'].alignment = Alignment(horizontal="right", vertical="center")
-        ws['C5'].alignment = Alignment(horizontal="right", vertical="center")
-        
-        # D3D4D5左对齐
-        ws['D3'].alignment = Alignment(horizontal="left", vertical="center")
-        ws['D4'].alignment = Alignment(horizontal="left", vertical="center")
-        ws['D5'].alignment = Alignment(horizontal="left", vertical="center")
-        
-        # 隐藏L列和M列
-        ws.column_dimensions['L'].hidden = True
-        ws.column_dimensions['M'].hidden = True
-    
-
-    
-    def add_total_row(self, ws, df_processed):
-        """添加合计行"""
-        subtotal_amount = df_processed['小计金额(结算)'].astype(float).sum()
-        tax_amount = df_processed['税额(结算)'].astype(float).sum()
-        total_amount = df_processed['小计价税(结算)'].astype(float).sum()
-        
-        last_row = ws.max_row + 1
-        totals = {
-            "单价(结算)": "合计",
-            "小计金额(结算)": "{:.2f}".format(subtotal_amount),
-            "税额(结算)": "{:.2f}".format(tax_amount),
-            "小计价税(结算)": "{:.2f}".format(total_amount)
-        }
-        
-        # 会计专用格式
-        accounting_format = '_-* #,##0.00_-;-* #,##0.00_-;_-* "-"??_-;_-@_-'
-        
-        for col, value in totals.items():
-            cell = ws.cell(row=last_row, column=self.expected_headers.index(col) + 1, value=value)
-            # 为数字列应用会计格式
-            if col in ["小计金额(结算)", "税额(结算)", "小计价税(结算)"]:
-                cell.number_format = accounting_format
-                # 设置右对齐
-                cell.alignment = Alignment(horizontal='right', vertical='center')
-        
-    def apply_styles(self, ws):
-        """应用样式到工作表"""
-        from openpyxl.styles import Border, Side
-        import gc
-        
-        # 使用缓存和批量处理优化性能
-        styles_cache = self._create_styles_cache()
-        
-        # 1. 批量设置页面属性
-        self._apply_page_settings(ws)
-        
-        # 2. 批量设置列宽（使用缓存）
-        self._apply_column_widths(ws)
-        
-        # 3. 批量应用单元格样式（使用缓存和生成器）
-        self._apply_cell_styles_optimized(ws, styles_cache)
-        
-        # 4. 清理缓存和内存
-        styles_cache.clear()
-        gc.collect()
-        
-    def _create_styles_cache(self):
-        """创建并缓存常用样式"""
-        return {
-            'header': {
-                'fill': None,  # 移除背景色
-                'font': Font(color='000000', size=13, name='微软雅黑', bold=False),  # 取消加粗
-                'border': None,  # 移除所有边框
-                'alignment': Alignment(horizontal="center", vertical="center")
-            },
-            'data': {
-                'font': Font(size=13, name='微软雅黑'),
-                'border': Border(left=Side(style='hair', color='D3D3D3'), right=Side(style='hair', color='D3D3D3'),
-                                top=Side(style='hair', color='D3D3D3'), bottom=Side(style='hair', color='D3D3D3')),
-                'alignment': Alignment(horizontal="center", vertical="center")
-            },
-            'even_row': PatternFill(start_color='F5F5F5', end_color='F5F5F5', fill_type='solid')
-        }
-        
-    def _apply_page_settings(self, ws):
-        """批量应用页面设置"""
-        # 页面属性批量设置
-        ws.page_setup.paperSize = ws.PAPERSIZE_A4
-        ws.page_setup.orientation = ws.ORIENTATION_PORTRAIT
-        ws.page_setup.fitToWidth = 1
-        ws.page_setup.fitToHeight = 0
-        ws.page_setup.horizontalCentered = True
-        ws.page_setup.verticalCentered = False
-        ws.sheet_view.zoomScale = 80  # 设置页面缩放比例为80%
-            
-        ws.sheet_properties.pageSetUpPr.fitToPage = True
-        ws.print_title_rows = '1:6'
-        ws.freeze_panes = 'A7'
-        
-        # 页边距批量设置
-        margins = {'left': 0.31, 'right': 0.31, 'top': 0.31, 'bottom': 0.79, 'header': 0.31, 'footer': 0.31}
-        ws.page_margins = PageMargins(**{k: v * 0.3937 for k, v in margins.items()})
-        
-        # 页脚设置
-        ws.oddFooter.center.font = '微软雅黑'
-        ws.oddFooter.center.size = 11
-        ws.oddFooter.center.text = "Page &[Page] of &[Pages]"
-        
-    def _apply_column_widths(self, ws):
-        """批量应用列宽设置（使用缓存）"""
-        widths = {
-            '订单号': 35, '收货日期': 18, '商品名称': 30, '实收数量': 12, '基本单位': 12,
-            '单价(结算)': 24, '小计金额(结算)': 24, '税额(结算)': 20, '小计价税(结算)': 20,
-            '部门': 20, '供应商/备用金报销账户': 36, '商品分类': 24
-        }
-        
-        # 使用生成器表达式优化内存使用
-        col_map = ((header, ws.cell(row=1, column=idx).column_letter)
-                   for idx, header in enumerate(self.expected_headers, 1))
-        
-        # 批量设置列宽
-        for header, col_letter in col_map:
-            if header in widths:
-                ws.column_dimensions[col_letter].width = widths[header]
-                
-    def _apply_cell_styles_optimized(self, ws, styles_cache):
-        """优化的单元格样式应用（使用缓存和生成器）"""
-        max_col = len(self.expected_headers)
-        
-        # 使用生成器优化内存使用
-        def cell_generator():
-            for row in ws.iter_rows(min_row=1, max_col=max_col, max_row=ws.max_row):
-                yield row
-        
-        # 批量应用样式
-        for row in cell_generator():
-            row_num = row[0].row
-            
-            # 检查行中是否有负数（用于设置整行黄色背景）
-            has_negative = False
-            if row_num > 6 and row_num < ws.max_row:  # 只检查数据行，不包括表头和合计行
-                for cell in row:
-                    if isinstance(cell.value, (int, float)) and cell.value < 0:
-                        has_negative = True
-                        break
-            
-            # 确定行样式
-            if row_num <= 6:  # 前6行（包括第6行表头）
-                style = styles_cache['header']
-            elif row_num == 7:  # 第7行（数据开始行）
-                style = {
-                    'fill': None,
-                    'font': Font(color='000000', size=13, name='微软雅黑', bold=False),
-                    'border': None,  # 取消第七行下框线
-                    'alignment': Alignment(horizontal="center", vertical="center")
-                }
-            elif row_num == ws.max_row:  # 合计行
-                style = {
-                    'fill': None,
-                    'font': Font(color='000000', size=13, name='微软雅黑', bold=True),
-                    'border': Border(top=Side(style='thin', color='000000')),
-                    'alignment': Alignment(horizontal="center", vertical="center"),
-                    'preserve_format': True  # 标记保留数字格式
-                }
-            else:
-                style = styles_cache['data']
-                
-            # 批量应用样式
-            for cell in row:
-                if style == styles_cache['header']:
-                    # 对于表头行（1-6行），不应用背景色
-                    if style['fill'] is not None:
-                        cell.fill = style['fill']
-                    cell.font = style['font']
-                    
-                    # 为第二行设置下边框
-                    if row_num == 2:
-                        cell.border = Border(bottom=Side(style='thin', color='000000'))
-                    # 为第六行（表头行）设置上边框和下边框
-                    elif row_num == 6:
-                        cell.border = Border(
-                            top=Side(style='thin', color='000000'),
-                            bottom=Side(style='thin', color='000000')
-                        )
-                    else:
-                        cell.border = style['border']
-                    
-                    # 为第3-5行设置右对齐
-                    if row_num in [3, 4, 5]:
-                        cell.alignment = Alignment(horizontal="right", vertical="center")
-                    # 为表头行的F列到I列设置右对齐
-                    elif row_num == 6 and cell.column in [6, 7, 8, 9]:  # F列到I列（单价、小计金额、税额、小计价税）
-                        cell.alignment = Alignment(horizontal="right", vertical="center")
-                    else:
-                        cell.alignment = style['alignment']
-                    
-                    # 设置第一行和第二行的行高
-                    if row_num <= 2:
-                        ws.row_dimensions[row_num].height = 26
-                    # 设置第七行的行高
-                    elif row_num == 6:
-                        ws.row_dimensions[row_num].height = 30
-                else:
-                    cell.font = style['font']
-                    cell.border = style['border']
-                    
-                    # 对于合计行的数字列，保持会计格式和右对齐
-                    if row_num == ws.max_row and cell.column in [7, 8, 9]:  # 合计行的小计金额、税额、小计价税列
-                        # 保持add_total_row中设置的会计格式和右对齐，不覆盖
-                        pass
-                    else:
-                        cell.alignment = style['alignment']
-                    
-                    # 设置背景色：如果行中有负数则设置黄色背景，否则按奇偶行设置
-                    if has_negative:
-                        cell.fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
-                    elif row_num % 2 == 0:
-                        cell.fill = styles_cache['even_row']
-                        
-                    # 负数字体设置为红色
-                    if isinstance(cell.value, (int, float)) and cell.value < 0:
-                        cell.font = Font(size=13, name='微软雅黑', color='FF0000')
-                    
     def bring_to_front(self):
         """将窗口带到前台"""
         self.root.lift()
@@ -1037,6 +481,8 @@ Sheet_tittle:供货明细表'''
         self.root.after_idle(self.root.attributes, '-topmost', False)
         
 if __name__ == "__main__":
+    # 打包后的程序启动子进程时需要
+    multiprocessing.freeze_support()
     root = ttk.Window(
         title=f"供应商对账工具 v{VERSION} - Powered By Cayman Fu @ Sofitel HAIKOU",
         themename="cosmo",
@@ -0,0 +1,14 @@
+import os
+import sys
+
+
+def application_path():
+    """程序所在目录：打包后为exe所在目录，源码运行时为源码所在目录"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def default_config_file():
+    """程序所在目录中的config.txt"""
+    return os.path.join(application_path(), 'config.txt')
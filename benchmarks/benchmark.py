@@ -0,0 +1,241 @@
+"""导出文件读取、预处理和对账单生成的性能测试
+
+示例：
+    python benchmarks/benchmark.py readers --rows 100000 1000000
+    python benchmarks/benchmark.py readers --rows 3000 --readers two-pass openpyxl
+    python benchmarks/benchmark.py dtypes --rows 100000
+    python benchmarks/benchmark.py writers --rows 2000 20000 100000
+    python benchmarks/benchmark.py styling --rows 1000 10000 50000
+    python benchmarks/benchmark.py pipeline --rows 20000 --suppliers 100
+
+readers：原来两次读取（先读前50行搜索表头，再按表头行重新读取整个文件）与各读取引擎单次读取（load_excel）的时间；
+dtypes：预处理后的数据按读取时的类型（文本列为Python字符串）和按列类型定义转换后的内存占用，以及排序和分组合计的时间；
+writers：各生成方式生成一个N行对账单的时间和文件大小；
+styling：openpyxl生成方式中只设置样式的时间，用于检查样式设置随行数的增长；
+pipeline：与命令行相同的完整流程（读取、分组、生成对账单）按供应商生成对账单的时间。
+每项测试在单独的子进程中运行，峰值内存互不影响（Windows上不统计峰值内存）
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# 对账单的列，用于搜索表头
+STATEMENT_HEADERS = [
+    "收货日期", "订单号", "商品名称", "实收数量", "基本单位",
+    "单价(结算)", "小计金额(结算)", "税额(结算)", "小计价税(结算)", "部门",
+    "税率", "供应商/备用金报销账户", "商品分类",
+]
+
+EXPORT_HEADERS = STATEMENT_HEADERS + [
+    "单价(含税)", "采购单价", "采购金额", "采购税额",
+    "退货", "合计退货数量", "退货合计金额(结算)", "退货合计税额(结算)", "退货合计价税(结算)",
+    "备注", "收货人", "仓库",
+]
+
+
+def peak_memory_mb():
+    """当前进程的峰值内存（MB），无法统计时为None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS单位为字节，Linux为KB
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def generate_export(path, rows, suppliers, seed=1):
+    """生成随机的收货单导出文件：标题行、表头和rows行数据，约3%为退货"""
+    from openpyxl import Workbook
+    rnd = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("收货单商品明细")
+    ws.append(["收货单商品明细"])
+    ws.append([])
+    ws.append(["导出时间", "2024-06-01"])
+    ws.append(["门店", "测试酒店"])
+    ws.append(EXPORT_HEADERS)
+    supplier_names = [f"供应商{i:03d}有限公司" for i in range(suppliers)]
+    departments = ["员工餐厅", "中餐厅", "西餐厅", "大堂吧"]
+    categories = ["活鲜", "酒水", "饮料", "蔬菜", "肉类"]
+    for i in range(rows):
+        quantity = rnd.randint(1, 50)
+        price = round(rnd.uniform(1, 300), 2)
+        amount = round(quantity * price, 2)
+        rate = rnd.choice([0.13, 0.09, 0.06, 0.0])
+        tax = round(amount * rate, 2)
+        is_return = rnd.random() < 0.03
+        received = datetime.datetime(2024, 5, rnd.randint(1, 28), rnd.randint(0, 23), rnd.randint(0, 59))
+        ws.append([received, f"SO{i:08d}", f"商品{rnd.randint(1, 2000)}", quantity, rnd.choice(["kg", "箱", "瓶"]),
+                   price, amount, tax, round(amount + tax, 2), rnd.choice(departments), rate,
+                   rnd.choice(supplier_names), rnd.choice(categories),
+                   price, price, amount, tax,
+                   "是" if is_return else "否", quantity if is_return else 0, amount if is_return else 0,
+                   tax if is_return else 0, round(amount + tax, 2) if is_return else 0,
+                   None, "张三", "主仓"])
+    wb.save(path)
+
+
+def two_pass_load(export_path, max_rows=50, min_matches=3):
+    """原来的读取方式：先读取前max_rows行搜索表头，再按表头行重新读取整个文件"""
+    import pandas as pd
+    sample = pd.read_excel(export_path, nrows=max_rows, header=None)
+    header_row = 35
+    for i in range(min(max_rows, len(sample))):
+        row = sample.iloc[i].astype(str)
+        if sum(1 for header in STATEMENT_HEADERS if any(header in str(cell) for cell in row)) >= min_matches:
+            header_row = i
+            break
+    return pd.read_excel(export_path, skiprows=header_row)
+
+
+def measure_reader(export_path, reader):
+    """reader为two-pass（原来的读取方式）或读取引擎的名称"""
+    import excel_reader
+    from header_schema import HeaderSchema, RETURN_COLUMNS
+    schema = HeaderSchema(STATEMENT_HEADERS, optional=RETURN_COLUMNS, excluded_positions=range(13, 17))
+    start = time.perf_counter()
+    if reader == 'two-pass':
+        df = two_pass_load(export_path)
+    else:
+        _, _, df = excel_reader.load_excel(export_path, schema, engine=reader)
+    return time.perf_counter() - start, peak_memory_mb(), f"{len(df)}行"
+
+
+def measure_dtypes(export_path, typed):
+    """typed为False时保留读取时的类型，为True时按COLUMN_DTYPES转换"""
+    import excel_reader
+    from header_schema import HeaderSchema, RETURN_COLUMNS, apply_column_types
+    schema = HeaderSchema(STATEMENT_HEADERS, optional=RETURN_COLUMNS, excluded_positions=range(13, 17))
+    # 读取时已按列位置只取出所需列并统一为标准表头
+    _, _, df = excel_reader.load_excel(export_path, schema)
+    if typed:
+        df = apply_column_types(df)
+    memory = df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+    start = time.perf_counter()
+    df.sort_values(by=['供应商/备用金报销账户', '收货日期', '税率'], kind='stable')
+    sort_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    df.groupby('供应商/备用金报销账户', sort=False, observed=True)[['小计金额(结算)', '税额(结算)', '小计价税(结算)']].sum()
+    groupby_seconds = time.perf_counter() - start
+    detail = f"数据 {memory:.1f}MB，排序 {sort_seconds * 1000:.0f}ms，分组合计 {groupby_seconds * 1000:.0f}ms"
+    return sort_seconds + groupby_seconds, peak_memory_mb(), detail
+
+
+def synthetic_statement(rows):
+    """一个供应商的N行对账单数据：(分组数据, 汇总, 标题行)，约1%为负数金额"""
+    import numpy as np
+    import pandas as pd
+    from statement_pipeline import EXPECTED_HEADERS
+    rng = np.random.default_rng(0)
+    amounts = rng.integers(-500, 50000, rows) / 100
+    df = pd.DataFrame({
+        '收货日期': '2024-05-01', '订单号': [f'SO{i:08d}' for i in range(rows)], '商品名称': [f'商品{i % 2000}' for i in range(rows)],
+        '实收数量': rng.integers(1, 20, rows).astype(float), '基本单位': 'kg', '单价(结算)': amounts, '小计金额(结算)': amounts,
+        '税额(结算)': (amounts * 0.13).round(2), '小计价税(结算)': (amounts * 1.13).round(2), '部门': '中餐厅', '税率': '13%',
+        '供应商/备用金报销账户': '供应商A', '商品分类': '蔬菜',
+    })[EXPECTED_HEADERS].astype(object)
+    summary = {'最早收货日期': pd.Timestamp('2024-05-01'), '小计金额合计': 0, '税额合计': 0, '小计价税合计': 0}
+    header_rows = [[''] * 5 + ['测试酒店'] + [''] * 7, [''] * 5 + ['供应商对账明细'] + [''] * 7] + [[''] * 13] * 3
+    return df, summary, header_rows
+
+
+def measure_writer(backend, rows, output_folder):
+    import statement_writer
+    from statement_pipeline import EXPECTED_HEADERS
+    df, summary, header_rows = synthetic_statement(rows)
+    output_filepath = os.path.join(output_folder, f'{backend}_{rows}.xlsx')
+    start = time.perf_counter()
+    statement_writer.create_writer(backend, EXPECTED_HEADERS).write(df, summary, header_rows, output_filepath)
+    return time.perf_counter() - start, peak_memory_mb(), f"{os.path.getsize(output_filepath):,}字节"
+
+
+def measure_styling(rows):
+    """只统计openpyxl生成方式的样式设置（apply_styles）时间，不包括写入内容和保存"""
+    from openpyxl import Workbook
+    from statement_writer import StatementWriter
+    from statement_pipeline import EXPECTED_HEADERS
+    df, summary, header_rows = synthetic_statement(rows)
+    writer = StatementWriter(EXPECTED_HEADERS)
+    ws = Workbook().active
+    plan = writer.row_plan(df, header_rows)
+    writer.write_excel_content(ws, df, summary, header_rows, plan)
+    start = time.perf_counter()
+    writer.apply_styles(ws, plan)
+    seconds = time.perf_counter() - start
+    return seconds, peak_memory_mb(), f"每行 {seconds / rows * 1e6:.0f}us"
+
+
+def measure_pipeline(export_path, backend, workers, output_folder):
+    from statement_pipeline import StatementConfig, StatementPipeline
+    config = StatementConfig(group_mode='按供应商', workers=workers, bypass_cache=True, force=True,
+                             output_folder=os.path.join(output_folder, backend), archive_folder=None,
+                             cache_folder=os.path.join(output_folder, 'cache'), writer_backend=backend)
+    start = time.perf_counter()
+    stats = StatementPipeline(config, log=lambda message: None).run([export_path])
+    return time.perf_counter() - start, peak_memory_mb(), f"{stats['statements_written']}个对账单"
+
+
+def run_isolated(function, *args):
+    """在新的子进程中运行一项测试"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(function, *args).result()
+
+
+def report(label, result):
+    seconds, peak, detail = result
+    memory = f"峰值 {peak:.0f}MB" if peak is not None else ""
+    print(f"{label:<28}{seconds:>9.2f}s  {memory:<14}{detail}", flush=True)
+
+
+def main(argv=None):
+    import excel_reader
+    from statement_writer import available_writer_backends
+
+    parser = argparse.ArgumentParser(description="导出文件读取、预处理和对账单生成的性能测试")
+    parser.add_argument('benchmark', choices=['readers', 'dtypes', 'writers', 'styling', 'pipeline'])
+    parser.add_argument('--rows', type=int, nargs='+', default=[20000], help="数据行数（默认：%(default)s）")
+    parser.add_argument('--suppliers', type=int, default=100, help="导出文件中的供应商数量（默认：%(default)s）")
+    parser.add_argument('--readers', nargs='+', default=['two-pass'] + excel_reader.available_engines(),
+                        help="读取方式：two-pass或读取引擎名称（默认：%(default)s）")
+    parser.add_argument('--backends', nargs='+', default=available_writer_backends(), help="对账单生成方式（默认：%(default)s）")
+    parser.add_argument('--workers', type=int, default=1, help="pipeline的并行进程数（默认：%(default)s）")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as folder:
+        for rows in args.rows:
+            if args.benchmark == 'writers':
+                for backend in args.backends:
+                    report(f"{backend} {rows}行", run_isolated(measure_writer, backend, rows, folder))
+                continue
+            if args.benchmark == 'styling':
+                report(f"openpyxl样式 {rows}行", run_isolated(measure_styling, rows))
+                continue
+            export_path = os.path.join(folder, f'export_{rows}.xlsx')
+            generate_export(export_path, rows, args.suppliers)
+            if args.benchmark == 'readers':
+                for reader in args.readers:
+                    report(f"{reader} {rows}行", run_isolated(measure_reader, export_path, reader))
+            elif args.benchmark == 'pipeline':
+                for backend in args.backends:
+                    report(f"{backend} {rows}行", run_isolated(measure_pipeline, export_path, backend, args.workers, folder))
+            else:
+                for typed in (False, True):
+                    label = '列类型转换后' if typed else '读取时的类型'
+                    report(f"{label} {rows}行", run_isolated(measure_dtypes, export_path, typed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,713 @@
+"""供应商对账确认函的生成：按商品分类标记品类，汇总员餐和非员餐的金额并写入确认函，不依赖界面
+
+界面和其他程序通过ConfirmationConfig和ConfirmationGenerator使用，日志和进度通过回调输出
+"""
+import os
+import re
+import time
+import warnings
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.worksheet.page import PageMargins
+import excel_reader
+import money
+from style_registry import StyleRegistry
+from app_paths import default_config_file
+
+# 忽略来自openpyxl.styles.stylesheet的UserWarning
+warnings.filterwarnings("ignore", category=UserWarning, module='openpyxl.styles.stylesheet')
+
+# 品类标记列的名称（写入对账单的N列）
+CLASSIFICATION_COLUMN = "品类标记"
+# 确认函中品类的显示顺序
+CATEGORY_ORDER = ["干货", "海鲜", "酒类", "饮料", "水", "其他"]
+# 员工餐厅的部门，其他部门（营业点）计入非员餐
+EMPLOYEE_RESTAURANTS = ["员工餐厅", "员工食堂"]
+# 商品分类中包含以下关键词的标记为干货
+DRY_GOODS_KEYWORDS = ["鱼虾蟹干及瑶柱干", "海参鲍鱼鱼翅干及肚干", "其他水产干货", "燕窝"]
+
+_THIN = Side(style='thin')
+_THIN_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+_DOUBLE_BOTTOM_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=Side(style='double'))
+_LEFT = Alignment(horizontal='left', vertical='center')
+_RIGHT = Alignment(horizontal='right', vertical='center')
+_BAND_FILL = PatternFill(start_color="F5F5F5", end_color="F5F5F5", fill_type="solid")
+_TOTAL_FONT = Font(bold=True, size=12)
+_TOTAL_FILL = PatternFill(start_color="BDD7EE", end_color="BDD7EE", fill_type="solid")
+_NO_FILL = PatternFill(fill_type=None)
+
+# 确认函汇总表格的命名样式：表头、品类行（品类列和金额列，部分行浅灰色背景）和合计行
+CONFIRMATION_STYLES = StyleRegistry({
+    'confirm-header': dict(font=Font(bold=True), alignment=Alignment(horizontal='center', vertical='center'),
+                           fill=PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid"),
+                           border=_THIN_BORDER),
+    'confirm-category': dict(font=DEFAULT_FONT, alignment=_LEFT, border=_THIN_BORDER),
+    'confirm-category-band': dict(font=DEFAULT_FONT, alignment=_LEFT, border=_THIN_BORDER, fill=_BAND_FILL),
+    'confirm-amount': dict(font=DEFAULT_FONT, alignment=_RIGHT, border=_THIN_BORDER, number_format='#,##0.00'),
+    'confirm-amount-band': dict(font=DEFAULT_FONT, alignment=_RIGHT, border=_THIN_BORDER, number_format='#,##0.00',
+                                fill=_BAND_FILL),
+    'confirm-total-label': dict(font=_TOTAL_FONT, alignment=_LEFT, border=_THIN_BORDER, fill=_TOTAL_FILL),
+    'confirm-total': dict(font=_TOTAL_FONT, alignment=_RIGHT, border=_THIN_BORDER, fill=_TOTAL_FILL,
+                          number_format='#,##0.00'),
+    'confirm-total-end': dict(font=_TOTAL_FONT, alignment=_RIGHT, border=_DOUBLE_BOTTOM_BORDER, fill=_TOTAL_FILL,
+                              number_format='#,##0.00'),
+})
+
+
+def num_to_chinese(num):
+    """
+    将数字转换为中文大写金额
+    """
+    # 特殊情况处理
+    if num == 0:
+        return '零圆整'
+    
+    # 按十进制精确转换为整数分，避免浮点误差导致角、分错误
+    integer_part, decimal_part = divmod(money.yuan_to_cents(num), 100)
+    
+    chinese_nums = ['零', '壹', '贰', '叁', '肆', '伍', '陆', '柒', '捌', '玖']
+    position_units = ['', '拾', '佰', '仟']  # 个位不添加单位，后面单独处理
+    section_units = ['', '万', '亿', '兆', '京', '垓']
+    
+    # 处理整数部分
+    chinese_str = ''
+    
+    # 特殊情况：整数部分为0
+    if integer_part == 0:
+        chinese_str = '零圆'
+    else:
+        # 将整数部分转换为字符串
+        str_integer = str(integer_part)
+        
+        # 按4位分段，从低位到高位
+        sections = []
+        for i in range(0, len(str_integer), 4):
+            start = max(0, len(str_integer) - i - 4)
+            end = len(str_integer) - i
+            sections.append(str_integer[start:end])
+        
+        # 处理每个分段
+        for section_index, section in enumerate(sections):
+            section_chinese = ''
+            has_value = False  # 标记这一段是否有非零值
+            
+            # 处理每一段内的数字，从高位到低位
+            for i, digit in enumerate(section):
+                position = len(section) - i - 1  # 位置（个、十、百、千）
+                digit_int = int(digit)
+                
+                if digit_int != 0:
+                    # 添加数字和单位
+                    section_chinese += chinese_nums[digit_int] + position_units[position]
+                    has_value = True
+                elif has_value:  # 如果之前有非零值，且当前是零
+                    # 避免多个连续的零
+                    if not section_chinese.endswith('零'):
+                        section_chinese += '零'
+            
+            # 处理末尾的零
+            if section_chinese.endswith('零'):
+                section_chinese = section_chinese[:-1]
+            
+            # 如果这一段有内容，添加万、亿等单位
+            if section_chinese != '':
+                if section_index < len(section_units):
+                    section_chinese += section_units[section_index]
+                chinese_str = section_chinese + chinese_str
+        
+        # 在整数部分的最后添加"圆"字（即个位数后面）
+        chinese_str += '圆'
+    
+    # 处理小数部分
+    if decimal_part > 0:
+        jiao = decimal_part // 10
+        fen = decimal_part % 10
+        
+        if jiao > 0:
+            chinese_str += chinese_nums[jiao] + '角'
+        if fen > 0:
+            chinese_str += chinese_nums[fen] + '分'
+    else:
+        # 只有在没有小数部分时才添加"整"字
+        chinese_str += '整'
+    
+    # 确保结果不为空
+    if not chinese_str:
+        chinese_str = '零圆整'
+    
+    return chinese_str
+
+
+def classify_categories(values):
+    """根据商品分类（M列）一次性标记所有行的品类，商品分类为空的行不标记（空字符串）"""
+    text = values.map(str).where(values.notna(), "")
+
+    def contains(keyword):
+        return text.str.contains(keyword, regex=False).to_numpy(dtype=bool)
+
+    # 条件按顺序匹配，与逐行判断的优先级相同
+    conditions = [
+        np.logical_or.reduce([contains(keyword) for keyword in DRY_GOODS_KEYWORDS]),
+        contains("活鲜"),
+        contains("酒"),
+        contains("饮料"),
+        (text == "水").to_numpy(dtype=bool),
+        (text != "").to_numpy(dtype=bool),
+    ]
+    return np.select(conditions, CATEGORY_ORDER, default="")
+
+
+def summarize_categories(df):
+    """按品类汇总员工餐厅和其他餐厅（营业点）的未税金额和税额（整数分）
+
+    df中的金额为元，汇总时另行转换为整数分精确相加，不修改df（保存失败时仍按原数据写出）；
+    返回{品类: (员餐未税金额, 员餐税额, 非员餐未税金额, 非员餐税额)}，包含CATEGORY_ORDER中的所有品类
+    """
+    is_employee = df["部门"].isin(EMPLOYEE_RESTAURANTS).to_numpy(dtype=bool)
+    amounts = pd.DataFrame({col: money.to_cents(df[col]) for col in ("小计金额(结算)", "税额(结算)")})
+    amounts = amounts.fillna(0).astype('int64')
+    sums = amounts.groupby([df[CLASSIFICATION_COLUMN].to_numpy(), is_employee]).sum().to_dict('index')
+
+    totals = {}
+    for category in CATEGORY_ORDER:
+        employee = sums.get((category, True), {})
+        other = sums.get((category, False), {})
+        totals[category] = tuple(int(amount.get(col, 0)) for amount in (employee, other)
+                                 for col in ("小计金额(结算)", "税额(结算)"))
+    return totals
+
+
+def load_hotel_info(config_file):
+    """从config.txt读取酒店全称、地址、财务部联系人和回传邮箱，读取失败时为空"""
+    hotel_name = ""
+    hotel_address = ""
+    contact_person = ""
+    email_address = ""
+
+    if os.path.exists(config_file):
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith("B2:"):
+                        hotel_name = line.replace("B2:", "").strip()
+                    elif line.startswith("D2:"):
+                        hotel_address = line.replace("D2:", "").strip()
+                    elif line.startswith("E2:"):
+                        contact_person = line.replace("E2:", "").strip()
+                    elif line.startswith("B32:"):
+                        email_address = line.replace("B32:", "").strip()
+        except Exception:
+            pass
+    return hotel_name, hotel_address, contact_person, email_address
+
+
+class ConfirmationConfig:
+    """确认函生成的设置"""
+
+    def __init__(self, edit_in_place=False, output_folder_name="Confirmed", config_file=None):
+        # 直接在原文件上操作，否则保存到原文件所在目录的输出文件夹
+        self.edit_in_place = edit_in_place
+        self.output_folder_name = output_folder_name
+        self.config_file = config_file or default_config_file()
+
+    def output_dir(self, file_path):
+        """文件处理结果所在的文件夹"""
+        if self.edit_in_place:
+            return os.path.dirname(file_path)
+        return os.path.join(os.path.dirname(file_path), self.output_folder_name)
+
+    def output_file(self, file_path):
+        """确认函的保存路径"""
+        if self.edit_in_place:
+            return file_path
+        file_name, file_ext = os.path.splitext(os.path.basename(file_path))
+        # 如果文件名已经包含"_分类"，则替换为"_确认函"，否则直接添加"_确认函"
+        if "_分类" in file_name:
+            file_name = file_name.replace("_分类", "_确认函")
+        else:
+            file_name = f"{file_name}_确认函"
+        return os.path.join(self.output_dir(file_path), f"{file_name}{file_ext}")
+
+
+class ConfirmationGenerator:
+    """根据对账单生成供应商对账确认函，不依赖界面
+
+    日志和进度通过回调输出：log(消息)，progress(0-100的整数)；回调在处理线程中调用
+    """
+
+    def __init__(self, config, log=print, progress=None):
+        self.config = config
+        self.log = log
+        self.progress = progress or (lambda value: None)
+
+    def run(self, file_paths):
+        """处理多个文件，返回处理结果的统计"""
+        start_time = time.time()
+        total_files = len(file_paths)
+        stats = {'files': total_files, 'files_succeeded': 0, 'files_failed': 0, 'outputs': []}
+
+        for i, file_path in enumerate(file_paths):
+            self.log(f"\n[{i+1}/{total_files}] 正在处理: {os.path.basename(file_path)}")
+            self.progress(int((i / total_files) * 100))
+
+            output_file = self.process_file(file_path)
+            if output_file:
+                stats['files_succeeded'] += 1
+                stats['outputs'].append(output_file)
+            else:
+                stats['files_failed'] += 1
+
+            # 更新完整进度
+            self.progress(int(((i + 1) / total_files) * 100))
+
+        # 计算处理时间
+        processing_time = time.time() - start_time
+        stats['seconds'] = round(processing_time, 2)
+
+        self.log(f"\n📊 批量处理完成！")
+        self.log(f"  ✓ 成功处理: {stats['files_succeeded']} 个文件")
+        if stats['files_failed'] > 0:
+            self.log(f"  ✗ 失败: {stats['files_failed']} 个文件")
+        self.log(f"  ⏱️ 总处理时间: {processing_time:.2f} 秒")
+        if total_files > 0:
+            avg_time = processing_time / total_files
+            self.log(f"  📈 平均每文件处理时间: {avg_time:.2f} 秒")
+
+        # 确保进度条显示100%
+        self.progress(100)
+        self.log(f"  ✅ 进度条已更新至100%")
+        return stats
+
+    def process_file(self, file_path):
+        """处理单个文件，返回确认函的路径，失败时返回None"""
+        try:
+            # 检查文件是否存在
+            if not os.path.exists(file_path):
+                self.log("警告：文件不存在")
+                return None
+
+            try:
+                df = excel_reader.read_excel(file_path, header_row=5)
+            except Exception as e:
+                self.log(f"✗ 读取Excel文件失败: {str(e)}")
+                return None
+
+            # 检查是否存在M列（Excel中的第13列）
+            if len(df.columns) < 13:  # 假设M列是第13列（索引为12）
+                self.log(f"  ✗ 文件格式错误：列数不足（需要至少13列，实际{len(df.columns)}列）")
+                return None
+
+            df.insert(13, CLASSIFICATION_COLUMN, classify_categories(df[df.columns[12]]))
+            totals = summarize_categories(df)
+
+            output_file = self.config.output_file(file_path)
+            if not self.config.edit_in_place:
+                # 确保Confirmed文件夹存在
+                os.makedirs(self.config.output_dir(file_path), exist_ok=True)
+
+            try:
+                try:
+                    self.write_confirmation(file_path, df, totals, output_file)
+                except Exception:
+                    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+                        df.to_excel(writer, index=False)
+            except Exception as e:
+                self.log(f"  ✗ 保存文件时出错: {str(e)}")
+                return None
+
+            if self.config.edit_in_place:
+                self.log(f"  ✓ 分类完成，已直接修改原文件")
+            else:
+                self.log(f"  ✓ 分类完成，文件已保存")
+            self.log(f"  → 文件路径: {output_file}")
+            return output_file
+
+        except Exception as e:
+            self.log(f"处理文件时出错: {str(e)}")
+            return None
+
+    def write_confirmation(self, file_path, df, totals, output_file):
+        """在对账单中写入品类标记，添加确认函工作表并保存到output_file"""
+        wb = load_workbook(file_path)
+        ws = wb.active
+
+        # 尝试读取Statement Sheet中的L7单元格数据（供应商名称）
+        supplier_name = ""
+        try:
+            # 检查是否存在名为"Statement"的工作表
+            if "Statement" in wb.sheetnames:
+                statement_sheet = wb["Statement"]
+                supplier_name = statement_sheet.cell(row=7, column=12).value  # L列是第12列
+            else:
+                # 如果没有Statement Sheet，尝试从第一个工作表的L7单元格读取
+                supplier_name = ws.cell(row=7, column=12).value  # L列是第12列
+        except Exception:
+            supplier_name = ""
+
+        # 添加新列标题
+        header_row = 6  # 表头在第6行
+        ws.cell(row=header_row, column=14, value=CLASSIFICATION_COLUMN)
+
+        # 添加分类结果
+        for i, category in zip(df.index, df[CLASSIFICATION_COLUMN].tolist()):
+            ws.cell(row=i+7, column=14, value=category)  # +7是因为Excel行从1开始，且表头在第6行
+
+        # 为F列到I列（单价、小计金额、税额、小计价税）设置会计专用格式
+        accounting_format = '_-* #,##0.00_-;-* #,##0.00_-;_-* "-"??_-;_-@_-'
+
+        # 获取数据行范围（从第7行开始到最后一行）
+        data_start_row = 7
+        data_end_row = data_start_row + len(df) - 1
+
+        # 设置F列到I列的会计格式（列6到列9）
+        for col in range(6, 10):  # F列(6)到I列(9)
+            for row in range(data_start_row, data_end_row + 1):
+                cell = ws.cell(row=row, column=col)
+                cell.number_format = accounting_format
+
+        # 创建汇总sheet
+        if "汇总" not in wb.sheetnames:
+            summary_sheet = wb.create_sheet(title="汇总")
+        else:
+            summary_sheet = wb["汇总"]
+
+        # 设置页面边距和页眉页脚（单位：厘米）
+        summary_sheet.page_margins = PageMargins(top=0.5/2.54, left=0.5/2.54, right=0.5/2.54, bottom=0.5/2.54, header=0.5/2.54, footer=0.5/2.54)
+        summary_sheet.page_setup.horizontalCentered = True
+        # 设置打印时所有列打印在一列
+        summary_sheet.page_setup.fitToWidth = 1
+        summary_sheet.page_setup.fitToHeight = False
+
+        # 设置汇总sheet的标题
+        summary_sheet.cell(row=1, column=1, value="供应商对账确认函")
+        summary_sheet.cell(row=1, column=1).font = Font(bold=True, size=16)
+        summary_sheet.cell(row=1, column=1).alignment = Alignment(horizontal='center', vertical='center')
+        # 合并标题单元格
+        summary_sheet.merge_cells('A1:F1')
+
+        # 读取config.txt文件获取酒店信息
+        hotel_name, hotel_address, contact_person, email_address = load_hotel_info(self.config.config_file)
+
+        # 在第二行开始插入文字
+        summary_sheet.cell(row=2, column=1, value="由酒店（酒店全称）：")
+        summary_sheet.cell(row=2, column=2, value=hotel_name)
+        summary_sheet.cell(row=3, column=1, value="地址：")
+        summary_sheet.cell(row=3, column=2, value=hotel_address)
+        summary_sheet.cell(row=4, column=1, value="财务部联系人：")
+        summary_sheet.cell(row=4, column=2, value=contact_person)
+        summary_sheet.cell(row=5, column=1, value="致供应商（供应商全称）：")
+        # 将从Statement Sheet读取的供应商名称写入B5单元格
+        summary_sheet.cell(row=5, column=2, value=supplier_name)
+        summary_sheet.cell(row=6, column=1, value="税务登记号码：")
+        summary_sheet.cell(row=7, column=1, value="对账联系人：")
+        summary_sheet.cell(row=8, column=1, value="经酒店与供应商共同核对，确认产生如下交易货款：")
+        summary_sheet.cell(row=9, column=1, value="➢ 含税总金额人民币大写：")
+        summary_sheet.cell(row=10, column=1, value="➢ 不含税金额：")
+        summary_sheet.cell(row=11, column=1, value="➢ 增值税税款：")
+        summary_sheet.cell(row=12, column=1, value="货款所属期间：")
+        summary_sheet.cell(row=13, column=1, value="明细对账信息如下：")
+
+        # 合并第2-7行的B-D列
+        for row in range(2, 8):
+            summary_sheet.merge_cells(start_row=row, start_column=2, end_row=row, end_column=6)
+            # 移除背景色
+            for col in range(1, 7):
+                cell = summary_sheet.cell(row=row, column=col)
+                cell.fill = _NO_FILL
+
+        # 合并第9-13行的B-D列
+        for row in range(9, 14):
+            summary_sheet.merge_cells(start_row=row, start_column=2, end_row=row, end_column=6)
+            # 移除背景色
+            for col in range(1, 7):
+                cell = summary_sheet.cell(row=row, column=col)
+                cell.fill = _NO_FILL
+
+        # 创建新的表格结构，与图片中的表格结构一致
+        # 表头第一行
+        summary_sheet.cell(row=14, column=1, value="")
+        summary_sheet.merge_cells(start_row=14, start_column=1, end_row=15, end_column=1)
+
+        summary_sheet.cell(row=14, column=2, value="员餐")
+        summary_sheet.merge_cells(start_row=14, start_column=2, end_row=14, end_column=3)
+
+        summary_sheet.cell(row=14, column=4, value="其他餐饮点 - 非员餐")
+        summary_sheet.merge_cells(start_row=14, start_column=4, end_row=14, end_column=5)
+
+        summary_sheet.cell(row=14, column=6, value="当月总应付账款金额")
+        summary_sheet.merge_cells(start_row=14, start_column=6, end_row=15, end_column=6)
+
+        # 表头第二行
+        summary_sheet.cell(row=15, column=2, value="不含税金额")
+        summary_sheet.cell(row=15, column=3, value="税费")
+        summary_sheet.cell(row=15, column=4, value="不含税金额")
+        summary_sheet.cell(row=15, column=5, value="税费")
+
+        # 设置品类列标题
+        summary_sheet.cell(row=14, column=1, value="品类")
+
+
+        # 设置表头样式（居中对齐，浅蓝色背景色，细边框）
+        CONFIRMATION_STYLES.register(wb)
+        for row in range(14, 16):  # 修改为只包含第14-15行
+            for col in range(1, 7):
+                summary_sheet.cell(row=row, column=col).style = 'confirm-header'
+
+        # 按用户要求的顺序显示所有分类
+        row_idx = 16  # 从第16行开始填充数据（表头占据14-15行）
+
+        # 初始化总计变量
+        total_employee_untaxed = 0
+        total_employee_tax = 0
+        total_other_untaxed = 0
+        total_other_tax = 0
+
+        # 直接填充各分类数据到新表格结构（员工餐厅和其他餐厅的金额已按品类汇总）
+        for category in CATEGORY_ORDER:
+            employee_untaxed, employee_tax, other_untaxed, other_tax = totals[category]
+
+            # 更新员工餐厅和其他餐厅总计
+            total_employee_untaxed += employee_untaxed
+            total_employee_tax += employee_tax
+            total_other_untaxed += other_untaxed
+            total_other_tax += other_tax
+
+            # 计算当月总应付账款金额
+            total_row_amount = employee_untaxed + employee_tax + other_untaxed + other_tax
+
+            # 写入汇总数据
+            summary_sheet.cell(row=row_idx, column=1, value=category)
+            summary_sheet.cell(row=row_idx, column=2, value="-" if employee_untaxed == 0 else money.cents_to_yuan(employee_untaxed))
+            summary_sheet.cell(row=row_idx, column=3, value="-" if employee_tax == 0 else money.cents_to_yuan(employee_tax))
+            summary_sheet.cell(row=row_idx, column=4, value="-" if other_untaxed == 0 else money.cents_to_yuan(other_untaxed))
+            summary_sheet.cell(row=row_idx, column=5, value="-" if other_tax == 0 else money.cents_to_yuan(other_tax))
+            summary_sheet.cell(row=row_idx, column=6, value="-" if total_row_amount == 0 else money.cents_to_yuan(total_row_amount))
+
+            # 设置单元格样式：品类列左对齐，数字列设置数字格式并右对齐；
+            # 交替背景色从第14行起算，第17、19行的A-D列为浅色背景
+            band = (row_idx - 14) % 2 == 1 and row_idx < 14 + len(CATEGORY_ORDER)
+            for col in range(1, 7):
+                style = 'confirm-category' if col == 1 else 'confirm-amount'
+                if band and col <= 4:
+                    style += '-band'
+                summary_sheet.cell(row=row_idx, column=col).style = style
+
+            row_idx += 1
+
+        # 添加总计行
+        summary_sheet.cell(row=row_idx, column=1, value="合计")
+        summary_sheet.cell(row=row_idx, column=2, value="-" if total_employee_untaxed == 0 else money.cents_to_yuan(total_employee_untaxed))
+        summary_sheet.cell(row=row_idx, column=3, value="-" if total_employee_tax == 0 else money.cents_to_yuan(total_employee_tax))
+        summary_sheet.cell(row=row_idx, column=4, value="-" if total_other_untaxed == 0 else money.cents_to_yuan(total_other_untaxed))
+        summary_sheet.cell(row=row_idx, column=5, value="-" if total_other_tax == 0 else money.cents_to_yuan(total_other_tax))
+
+        # 计算总金额
+        total_amount = total_employee_untaxed + total_employee_tax + total_other_untaxed + total_other_tax
+        summary_sheet.cell(row=row_idx, column=6, value="-" if total_amount == 0 else money.cents_to_yuan(total_amount))
+
+        # 设置总计行样式：合计文字左对齐，金额右对齐；E、F列底部双边框
+        summary_sheet.cell(row=row_idx, column=1).style = 'confirm-total-label'
+        for col in range(2, 7):
+            summary_sheet.cell(row=row_idx, column=col).style = 'confirm-total' if col <= 4 else 'confirm-total-end'
+
+        # 读取总计行的第6列（总金额）并转换为中文大写写入B9单元格
+        try:
+            # total_amount已在前面计算
+            if total_amount is not None:
+                # 转换为中文大写（函数内部已添加"圆"字）
+                chinese_amount = num_to_chinese(money.cents_to_decimal(total_amount))
+                # 转换为小写
+                lowercase_amount = f"{money.format_cents(total_amount)}元"
+                # 写入B9单元格（含税总金额人民币大写）
+                summary_sheet.cell(row=9, column=2, value=f"{chinese_amount}（小写：{lowercase_amount}）")
+        except Exception:
+            # 如果出错，尝试直接写入原始值
+            try:
+                if total_amount is not None:
+                    summary_sheet.cell(row=9, column=2, value=f"{money.format_cents(total_amount)}元")
+            except Exception:
+                pass
+
+        # 读取总计行的数据并写入B10和B11单元格
+        try:
+            # 使用当前总计行的数据
+            total_untaxed = total_employee_untaxed + total_other_untaxed
+            total_tax = total_employee_tax + total_other_tax
+
+            if total_untaxed is not None:
+                # 写入B10单元格，前面加上"小写"，后面加上"元"
+                summary_sheet.cell(row=10, column=2, value=f"小写{money.format_cents(total_untaxed)}元")
+
+            if total_tax is not None:
+                # 获取Statement sheet中的税率信息
+                tax_rates = set()
+                if "Statement" in wb.sheetnames:
+                    statement_sheet = wb["Statement"]
+                    for row in range(2, statement_sheet.max_row + 1):  # 从第2行开始，跳过表头
+                        tax_rate = statement_sheet.cell(row=row, column=11).value  # K列是第11列
+                        if tax_rate is not None and isinstance(tax_rate, (int, float, str)):
+                            try:
+                                if isinstance(tax_rate, str):
+                                    # 尝试将百分比字符串转换为数字
+                                    tax_rate = float(tax_rate.strip('%'))
+                                tax_rates.add(tax_rate)
+                            except ValueError:
+                                continue
+
+                # 根据税率生成税率文本
+                if tax_rates:
+                    tax_rates_list = sorted([f"{int(rate)}%" for rate in tax_rates])
+                    tax_rate_text = "，".join(tax_rates_list)
+                else:
+                    tax_rate_text = ""
+
+                # 写入B11单元格，包含税率信息
+                summary_sheet.cell(row=11, column=2, value=f"小写{money.format_cents(total_tax)}元 (税率：{tax_rate_text})")
+        except Exception:
+            # 如果出错，继续执行
+            pass
+
+        # 读取Statement sheet中的A列年月数据并转换格式写入B12单元格
+        try:
+            # 获取年月数据
+            year_month = ""
+            # 检查是否存在名为"Statement Sheet"的工作表
+            if "Statement Sheet" in wb.sheetnames:
+                statement_sheet = wb["Statement Sheet"]
+                # 尝试从A列获取年月数据（通常在A1或其他位置）
+                for row in range(1, 10):  # 检查前10行
+                    cell_value = statement_sheet.cell(row=row, column=1).value
+                    if cell_value and isinstance(cell_value, str) and re.search(r'\d{4}[-年]\d{1,2}', cell_value):
+                        year_month = cell_value
+                        break
+
+            # 如果没有找到年月数据，尝试从文件名获取
+            if not year_month:
+                file_name = os.path.basename(file_path)
+                match = re.match(r'(\d{4}-\d{2})_(.+?)(_分类)?\.xlsx', file_name)
+                if match:
+                    year_month = match.group(1)
+
+            # 如果仍然没有找到年月数据，使用当前年月
+            if not year_month:
+                now = datetime.now()
+                year_month = now.strftime('%Y-%m')
+
+            # 解析年月数据
+            if '-' in year_month:
+                year, month = year_month.split('-')
+            elif '年' in year_month:
+                match = re.search(r'(\d{4})年(\d{1,2})', year_month)
+                if match:
+                    year, month = match.group(1), match.group(2)
+                else:
+                    raise ValueError(f"无法解析年月格式: {year_month}")
+            else:
+                raise ValueError(f"无法解析年月格式: {year_month}")
+
+            # 获取月份的最后一天
+            if int(month) == 12:
+                next_month = datetime(int(year) + 1, 1, 1)
+            else:
+                next_month = datetime(int(year), int(month) + 1, 1)
+
+            last_day = (next_month - timedelta(days=1)).day
+
+            # 格式化为"2025年6月1日至2025年6月30日"格式
+            formatted_date = f"{year}年{month}月1日至{year}年{month}月{last_day}日"
+
+            # 写入B12单元格
+            summary_sheet.cell(row=12, column=2, value=formatted_date)
+        except Exception:
+            # 如果出错，继续执行
+            pass
+
+        # 调整列宽
+        summary_sheet.column_dimensions["A"].width = 28
+        summary_sheet.column_dimensions["B"].width = 15
+        summary_sheet.column_dimensions["C"].width = 12
+        summary_sheet.column_dimensions["D"].width = 12
+        summary_sheet.column_dimensions["E"].width = 12
+        summary_sheet.column_dimensions["F"].width = 20
+        # 在A25单元格开始插入备注文字
+        summary_sheet.cell(row=25, column=1, value="备注：")
+        summary_sheet.cell(row=25, column=1).font = Font(bold=True)
+        # 合并A25-F25单元格
+        summary_sheet.merge_cells(start_row=25, start_column=1, end_row=25, end_column=6)
+
+        # 设置备注文字的样式
+        remark_font = Font(size=11)
+        remark_alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
+
+        # 添加备注内容
+        remarks = [
+            "1. 品类根据供应商实际送货的情况填写，不适用的可留空",
+            "2. 员餐货款的不含税金额，如零税率，酒店需要根据实际收货记录的总金额去换算含税及不含税填写",
+            "3. 本函由双方核对原始收货单据后填写，供应商当月供货数据与酒店当月应付账款金额一致",
+            "4. 供应商根据核对后确认的金额开具相关增值税发票给酒店",
+            "5. 请供应商在确认后，需加盖公章或财务专用章，扫描后邮件回传酒店做存档",
+            "6. 建议随确认函发送增值税发票号和发票金额以及发票复印件",
+            "7. 电子邮件发送至：",
+            "8. 本函请在收到后 2 个工作日内返回",
+            "9. 扫描件需清晰显示：金额、盖章、日期三要素，模糊文件视为无效"
+        ]
+
+        for i, remark in enumerate(remarks):
+            cell = summary_sheet.cell(row=26+i, column=1, value=remark)
+            cell.font = remark_font
+            cell.alignment = remark_alignment
+            # 合并每行的A至F列，但跳过第32行（26+6）
+            if 26+i != 32:
+                summary_sheet.merge_cells(start_row=26+i, start_column=1, end_row=26+i, end_column=6)
+
+        # 在B32单元格中添加邮箱地址
+        email_cell = summary_sheet.cell(row=32, column=2, value=email_address)
+        email_cell.font = remark_font
+        email_cell.alignment = remark_alignment
+        # 合并B32到F32单元格
+        summary_sheet.merge_cells(start_row=32, start_column=2, end_row=32, end_column=6)
+
+        # 在第36行A列插入供应商确认日期文字
+        date_font = Font(size=11)
+        date_alignment = Alignment(horizontal='left', vertical='center')
+
+        date_cell = summary_sheet.cell(row=36, column=1, value="供应商确认日期：_______年_______月_______日")
+        date_cell.font = date_font
+        date_cell.alignment = date_alignment
+        # 合并供应商确认日期行的A至F列
+        summary_sheet.merge_cells(start_row=36, start_column=1, end_row=36, end_column=6)
+        # 合并第39行的A至F列
+        summary_sheet.merge_cells(start_row=39, start_column=1, end_row=39, end_column=6)
+
+        # 在第38行插入供应商盖章确认文字
+        stamp_font = Font(size=13, underline="single")
+        stamp_alignment = Alignment(horizontal='center', vertical='center')
+
+        stamp_cell = summary_sheet.cell(row=39, column=1, value="供应商盖章确认")
+        stamp_cell.font = stamp_font
+        stamp_cell.alignment = stamp_alignment
+        # 合并第39行的A至F列
+        summary_sheet.merge_cells(start_row=39, start_column=1, end_row=39, end_column=6)
+
+        # 将"汇总"sheet更名为"确认函"
+        summary_sheet.title = "确认函"
+
+        # 设置第2行到第12行无背景色
+        for row in range(2, 13):
+            for col in range(1, 7):
+                cell = summary_sheet.cell(row=row, column=col)
+                cell.fill = _NO_FILL
+
+        # 设置第2行、第5行、第8行和第13行的行高为30
+        for row_num in [2, 5, 8, 13]:
+            summary_sheet.row_dimensions[row_num].height = 30
+
+        # 隐藏品类标记列（第14列，即N列）
+        ws.column_dimensions['N'].hidden = True
+
+        wb.save(output_file)
@@ -0,0 +1,227 @@
+import os
+import datetime
+import itertools
+import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    from python_calamine import CalamineWorkbook
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+# 表头搜索的最大行数
+HEADER_SEARCH_ROWS = 50
+# 分批读取时每批的行数
+DEFAULT_CHUNK_ROWS = 50000
+
+
+def _iter_rows_calamine(file_path):
+    """使用calamine（Rust实现）逐行读取第一个工作表"""
+    wb = CalamineWorkbook.from_path(file_path)
+    try:
+        sheet = wb.get_sheet_by_index(0)
+        # calamine从第一个非空单元格开始返回数据，补齐前面的空行和空列，保证行列位置与Excel一致
+        start_row, start_col = sheet.start if sheet.start else (0, 0)
+        for _ in range(start_row):
+            yield ()
+        padding = (None,) * start_col
+        for row in sheet.iter_rows():
+            # 统一为openpyxl的取值约定：空单元格为None，日期为datetime
+            yield padding + tuple(
+                None if value == '' else
+                datetime.datetime.combine(value, datetime.time()) if type(value) is datetime.date else
+                value
+                for value in row
+            )
+    finally:
+        wb.close()
+
+
+def _iter_rows_openpyxl(file_path):
+    """使用openpyxl只读模式逐行读取第一个工作表"""
+    wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[0]
+        # 导出文件中的维度信息经常不准确，按实际单元格读取
+        ws.reset_dimensions()
+        yield from ws.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _iter_rows_pandas(file_path):
+    """使用pd.read_excel读取第一个工作表（兼容所有pandas支持的格式）"""
+    df = pd.read_excel(file_path, header=None, dtype=object)
+    for row in df.itertuples(index=False, name=None):
+        yield tuple(None if pd.isna(value) else value for value in row)
+
+
+# 读取引擎：名称 -> (逐行读取函数, 支持的文件扩展名, 是否可用)，按优先级排列
+ENGINES = {
+    'calamine': (_iter_rows_calamine, ('.xlsx', '.xlsm', '.xlsb', '.xls', '.ods'), HAS_CALAMINE),
+    'openpyxl': (_iter_rows_openpyxl, ('.xlsx', '.xlsm'), True),
+    'pandas': (_iter_rows_pandas, None, True),
+}
+# 真正逐行流式读取的引擎（calamine和pandas会先把整个工作表载入内存）
+STREAMING_ENGINES = ('openpyxl',)
+
+
+def available_engines():
+    """返回当前环境中已安装的读取引擎名称"""
+    return [name for name, (_, _, installed) in ENGINES.items() if installed]
+
+
+def select_engine(file_path, streaming=False):
+    """根据已安装的依赖和文件格式自动选择最快的读取引擎，streaming为True时优先选择流式引擎"""
+    ext = os.path.splitext(file_path)[1].lower()
+    candidates = [name for name, (_, extensions, installed) in ENGINES.items()
+                  if installed and (extensions is None or ext in extensions)]
+    if streaming:
+        candidates = [name for name in candidates if name in STREAMING_ENGINES] or candidates
+    return candidates[0] if candidates else 'pandas'
+
+
+def iter_sheet_rows(file_path, engine=None):
+    """逐行读取第一个工作表，返回值元组；未指定引擎时自动选择"""
+    engine = engine or select_engine(file_path)
+    if engine not in available_engines():
+        raise ValueError(f"读取引擎 {engine} 不可用")
+    iter_rows = ENGINES[engine][0]
+    yield from iter_rows(file_path)
+
+
+def _make_column_names(header):
+    """按pandas的规则生成列名：空表头命名为Unnamed，重复表头添加序号"""
+    names = []
+    seen = {}
+    for idx, value in enumerate(header):
+        name = f"Unnamed: {idx}" if value is None or value == '' else value
+        if name in seen:
+            seen[name] += 1
+            candidate = f"{name}.{seen[name]}"
+            while candidate in seen:
+                seen[name] += 1
+                candidate = f"{name}.{seen[name]}"
+            seen[candidate] = 0
+            name = candidate
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _infer_column_types(df):
+    """与pd.read_excel保持一致的类型推断：数字文本转为数值，全为整数的列转为int64"""
+    df = df.infer_objects()
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object:
+            try:
+                df[col] = pd.to_numeric(series)
+            except (ValueError, TypeError):
+                pass
+        elif series.dtype.kind == 'f' and series.notna().all() and (series % 1 == 0).all():
+            df[col] = series.astype('int64')
+    return df
+
+
+def _build_frame(header, data):
+    """由表头行和数据行构建DataFrame"""
+    # 去掉末尾的空行
+    while data and all(cell is None for cell in data[-1]):
+        data.pop()
+
+    width = max([len(header)] + [len(row) for row in data])
+    columns = _make_column_names(list(header) + [None] * (width - len(header)))
+    df = pd.DataFrame(data, columns=columns) if data else pd.DataFrame(columns=columns)
+    return _infer_column_types(df)
+
+
+def _iter_projected(rows, column_map, columns):
+    """按表头的列位置只取出所需列，跳过这些列全部为空的行（包括末尾带格式的空行）"""
+    positions = [column_map[col] for col in columns]
+    width = max(positions) + 1
+    for row in rows:
+        if len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+        values = tuple(row[position] for position in positions)
+        if any(value is not None for value in values):
+            yield values
+
+
+def _build_projected_frame(columns, data):
+    """由只包含所需列的数据行构建DataFrame，列名为标准表头"""
+    df = pd.DataFrame(data, columns=columns) if data else pd.DataFrame(columns=columns)
+    return _infer_column_types(df)
+
+
+def _scan_header(rows, schema, max_rows):
+    """从行迭代器中缓存前max_rows行，用表头结构定位表头
+
+    返回(表头行号, 列位置映射, 表头行, 表头之后已缓存的数据行)，未找到表头时行号为None
+    """
+    head_rows = []
+    for row in rows:
+        head_rows.append(row)
+        if len(head_rows) >= max_rows:
+            break
+
+    header_row, column_map = schema.find_header(head_rows)
+    if header_row is None:
+        return None, {}, (), []
+    return header_row, column_map, head_rows[header_row], head_rows[header_row + 1:]
+
+
+def load_excel(file_path, schema, max_rows=HEADER_SEARCH_ROWS, engine=None):
+    """单次打开工作簿：在前max_rows行中定位表头，然后从同一个流中继续读取数据行
+
+    读取时只保留表头结构中匹配到的列，列名为标准表头；不需要的列和空行不会构建到DataFrame中。
+    返回(表头行号, 列位置映射, DataFrame)，未找到表头时返回(None, {}, None)
+    """
+    rows = iter_sheet_rows(file_path, engine)
+    header_row, column_map, _, data = _scan_header(rows, schema, max_rows)
+    if header_row is None:
+        return None, {}, None
+    # 表头之后已缓存的行加上流中剩余的行即为数据行
+    columns = schema.columns(column_map)
+    data = list(_iter_projected(itertools.chain(data, rows), column_map, columns))
+    return header_row, column_map, _build_projected_frame(columns, data)
+
+
+def iter_excel_chunks(file_path, schema, chunk_rows=DEFAULT_CHUNK_ROWS, max_rows=HEADER_SEARCH_ROWS, engine=None):
+    """与load_excel相同的表头定位和列投影，但数据按chunk_rows行分批返回，整个文件不会同时驻留内存
+
+    返回(表头行号, 列位置映射, DataFrame分块生成器)，没有数据行时生成一个空的分块；
+    未找到表头时返回(None, {}, None)
+    """
+    rows = iter_sheet_rows(file_path, engine or select_engine(file_path, streaming=True))
+    header_row, column_map, _, buffered = _scan_header(rows, schema, max_rows)
+    if header_row is None:
+        return None, {}, None
+    columns = schema.columns(column_map)
+
+    def chunks():
+        data = []
+        produced = False
+        for values in _iter_projected(itertools.chain(buffered, rows), column_map, columns):
+            data.append(values)
+            if len(data) >= chunk_rows:
+                yield _build_projected_frame(columns, data)
+                produced = True
+                data = []
+        if data or not produced:
+            yield _build_projected_frame(columns, data)
+
+    return header_row, column_map, chunks()
+
+
+def read_excel(file_path, header_row, engine=None):
+    """按指定的表头行读取第一个工作表，相当于pd.read_excel(file_path, header=header_row)"""
+    rows = iter_sheet_rows(file_path, engine)
+    header = ()
+    for i, row in enumerate(rows):
+        if i == header_row:
+            header = row
+            break
+    return _build_frame(header, list(rows))
@@ -0,0 +1,83 @@
+import pandas as pd
+from recon_engine import format_tax_rate
+
+# 分组方式：名称 -> (分组列, 文件名模板, 日志中的分组说明)
+# 文件名模板中{年月}为对账月份，其余字段为分组列在KEY_FIELDS中的字段名
+GROUP_MODES = {
+    '按供应商': (['供应商/备用金报销账户'], '{年月}_{供应商}', '供应商'),
+    '按供应商和税率': (['供应商/备用金报销账户', '税率'], '{年月}_{供应商}_{税率}', '供应商-税率组合'),
+    '按供应商和部门': (['供应商/备用金报销账户', '分组部门'], '{年月}_{供应商}_{部门}', '供应商-部门组合'),
+    '按供应商和周': (['供应商/备用金报销账户', '收货周'], '{年月}_{供应商}_{周}', '供应商-周组合'),
+}
+DEFAULT_GROUP_MODE = '按供应商'
+
+# 分组列 -> 文件名模板和日志中使用的字段名
+KEY_FIELDS = {
+    '供应商/备用金报销账户': '供应商',
+    '税率': '税率',
+    '分组部门': '部门',
+    '收货周': '周',
+}
+# 分组内的排序列
+SORT_COLUMNS = ['收货日期', '税率']
+
+
+def add_group_columns(df, key_columns):
+    """添加由其他列计算得到的分组列，已存在时不重复计算：
+    收货周按ISO周计算（2024年第18周）；分组部门为部门列，空白部门记为"无部门"
+
+    没有收货日期或部门的行单独成组，不会因分组键为空而被丢弃；部门列本身保持导出时的内容
+    """
+    if '收货周' in key_columns and '收货周' not in df.columns:
+        dates = pd.to_datetime(df['收货日期'], errors='coerce')
+        iso = dates.dt.isocalendar()
+        weeks = iso['year'].astype(str) + '年第' + iso['week'].astype(str).str.zfill(2) + '周'
+        df = df.assign(收货周=weeks.where(dates.notna(), '无收货日期'))
+    if '分组部门' in key_columns and '分组部门' not in df.columns:
+        departments = df['部门']
+        if isinstance(departments.dtype, pd.CategoricalDtype) and '无部门' not in departments.cat.categories:
+            departments = departments.cat.add_categories('无部门')
+        df = df.assign(分组部门=departments.fillna('无部门'))
+    return df
+
+
+def split_groups(df, key_columns):
+    """按分组列排序，使每个分组的行连续，然后一次计算所有分组的行位置
+
+    返回(排序后的DataFrame, [(分组键元组, 行位置slice)])，分组按键的顺序排列，
+    分组内按收货日期和税率排序；分组键为空的行不属于任何分组
+    """
+    sort_columns = key_columns + [col for col in SORT_COLUMNS if col in df.columns and col not in key_columns]
+    df = df.sort_values(by=sort_columns, kind='stable').reset_index(drop=True)
+    indices = df.groupby(key_columns, sort=False, observed=True).indices
+    groups = []
+    for key, positions in indices.items():
+        key = key if isinstance(key, tuple) else (key,)
+        groups.append((key, slice(int(positions[0]), int(positions[-1]) + 1)))
+    return df, groups
+
+
+def format_key_value(column, value):
+    """分组键在文件名中的显示值"""
+    if column == '税率':
+        return format_tax_rate(value)
+    return str(value)
+
+
+def sanitize_filename(value):
+    """文件名中只保留字母数字、空格和点，其余字符替换为下划线"""
+    return ''.join([c if c.isalnum() or c in (' ', '.') else '_' for c in str(value)]).strip('_')
+
+
+def build_filename(template, year_month, key_columns, group_key):
+    """按文件名模板生成对账单文件名"""
+    fields = {KEY_FIELDS.get(column, column): sanitize_filename(format_key_value(column, value))
+              for column, value in zip(key_columns, group_key)}
+    return template.format(年月=year_month, **fields) + '.xlsx'
+
+
+def describe_group(key_columns, group_key):
+    """日志中的分组说明，如：供应商A (税率: 0.13)"""
+    name = str(group_key[0])
+    details = [f"{KEY_FIELDS.get(column, column)}: {value}" for column, value in zip(key_columns[1:], group_key[1:])]
+    return f"{name} ({', '.join(details)})" if details else name
@@ -0,0 +1,125 @@
+import pandas as pd
+import money
+
+# 标准表头 -> 导出文件中出现过的名称（包括标准表头本身）
+HEADER_ALIASES = {
+    "收货日期": ("收货日期",),
+    "订单号": ("订单号",),
+    "商品名称": ("商品名称",),
+    "实收数量": ("实收数量",),
+    "基本单位": ("基本单位", "单位"),
+    "单价(结算)": ("单价(结算)",),
+    "小计金额(结算)": ("小计金额(结算)",),
+    "税额(结算)": ("税额(结算)",),
+    "小计价税(结算)": ("小计价税(结算)",),
+    "部门": ("部门",),
+    "税率": ("税率",),
+    "供应商/备用金报销账户": ("供应商/备用金报销账户",),
+    "商品分类": ("商品分类",),
+    "退货": ("退货",),
+    "合计退货数量": ("合计退货数量",),
+    "退货合计金额(结算)": ("退货合计金额(结算)",),
+    "退货合计税额(结算)": ("退货合计税额(结算)",),
+    "退货合计价税(结算)": ("退货合计价税(结算)",),
+}
+
+# 退货相关的可选列
+RETURN_COLUMNS = ['退货', '合计退货数量', '退货合计金额(结算)', '退货合计税额(结算)', '退货合计价税(结算)']
+
+# 读取时统一的列类型：大量重复的文本列使用分类类型，结算金额使用整数分，单价和税率使用浮点数，收货日期使用日期类型
+COLUMN_DTYPES = {
+    "收货日期": "datetime64",
+    "基本单位": "category",
+    "单价(结算)": "float64",
+    "小计金额(结算)": "cents",
+    "税额(结算)": "cents",
+    "小计价税(结算)": "cents",
+    "部门": "category",
+    "税率": "float64",
+    "供应商/备用金报销账户": "category",
+    "商品分类": "category",
+    "退货": "category",
+    "退货合计金额(结算)": "float64",
+    "退货合计税额(结算)": "float64",
+    "退货合计价税(结算)": "float64",
+}
+
+
+def apply_column_types(df, dtypes=COLUMN_DTYPES):
+    """按列类型定义转换数据，无法转换的值置为空；收货日期只保留日期部分"""
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        if dtype == 'datetime64':
+            df[col] = pd.to_datetime(df[col], errors='coerce').dt.normalize()
+        elif dtype == 'cents':
+            # 已经由to_cents转换过的列（如合并后的数据）不再转换，以Int64类型识别，不按是否为整数判断
+            if not money.is_cents(df[col]):
+                df[col] = money.to_cents(df[col])
+        elif dtype == 'category':
+            df[col] = df[col].astype('category')
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+    return df
+
+
+def normalize_header(value):
+    """统一表头写法：去掉首尾空白，全角括号转为半角"""
+    if value is None:
+        return ''
+    return str(value).strip().replace('（', '(').replace('）', ')')
+
+
+class HeaderSchema:
+    """表头结构：把必需列和可选列的所有别名编译成一个查找表，逐行一次扫描完成匹配"""
+
+    def __init__(self, required, optional=(), aliases=HEADER_ALIASES, excluded_positions=(), min_matches=3):
+        self.required = list(required)
+        self.optional = list(optional)
+        self.excluded_positions = frozenset(excluded_positions)
+        self.min_matches = min_matches
+
+        # 别名 -> (标准表头, 优先级)，排在前面的别名优先
+        self.lookup = {}
+        for canonical in self.required + self.optional:
+            for priority, alias in enumerate(aliases.get(canonical, (canonical,))):
+                self.lookup[normalize_header(alias)] = (canonical, priority)
+
+    def match_row(self, row):
+        """返回该行中标准表头到列位置的映射
+
+        同一标准表头出现多次时，优先取标准名称，其次按出现顺序取第一个
+        """
+        column_map = {}
+        priorities = {}
+        for position, cell in enumerate(row):
+            if cell is None or position in self.excluded_positions:
+                continue
+            match = self.lookup.get(normalize_header(cell))
+            if match is None:
+                continue
+            canonical, priority = match
+            if canonical not in column_map or priority < priorities[canonical]:
+                column_map[canonical] = position
+                priorities[canonical] = priority
+        return column_map
+
+    def score(self, column_map):
+        """匹配到的必需列数量"""
+        return sum(1 for canonical in self.required if canonical in column_map)
+
+    def find_header(self, rows):
+        """在行中搜索表头，返回(行号, 列位置映射)，未找到时返回(None, {})"""
+        for i, row in enumerate(rows):
+            column_map = self.match_row(row)
+            if self.score(column_map) >= self.min_matches:
+                return i, column_map
+        return None, {}
+
+    def columns(self, column_map):
+        """列位置映射中包含的标准表头，按必需列、可选列的顺序排列"""
+        return [canonical for canonical in self.required + self.optional if canonical in column_map]
+
+    def missing(self, column_map):
+        """列位置映射中缺少的必需列"""
+        return [canonical for canonical in self.required if canonical not in column_map]
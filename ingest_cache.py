@@ -0,0 +1,100 @@
+import os
+import hashlib
+import importlib.util
+import pandas as pd
+
+# Feather格式需要pyarrow，由pandas读写，这里只检查是否已安装，不导入
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+# 预处理结果的格式发生变化时递增，使旧缓存失效
+CACHE_VERSION = 5
+# 缓存目录默认大小上限
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# 计算文件哈希时每次读取的块大小
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class IngestCache:
+    """预处理结果的磁盘缓存，按文件内容哈希、大小和修改时间索引，超出上限时按最近使用时间淘汰"""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = '.feather' if HAS_PYARROW else '.pkl'
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, file_path):
+        """根据文件内容哈希、大小和修改时间生成缓存键"""
+        stat = os.stat(file_path)
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return f"v{CACHE_VERSION}_{digest.hexdigest()}_{stat.st_size}_{stat.st_mtime_ns}"
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    def contains(self, key):
+        """是否存在该缓存条目"""
+        return os.path.exists(self._entry_path(key))
+
+    def load(self, key):
+        """读取缓存的DataFrame，未命中或缓存损坏时返回None"""
+        path = self._entry_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            if self.extension == '.feather':
+                df = pd.read_feather(path)
+            else:
+                df = pd.read_pickle(path)
+        except Exception:
+            # 缓存文件损坏，直接删除
+            self._remove(path)
+            return None
+        # 更新访问时间，用于LRU淘汰
+        os.utime(path, None)
+        return df
+
+    def store(self, key, df):
+        """写入缓存并按大小上限淘汰旧条目，返回是否写入成功"""
+        path = self._entry_path(key)
+        tmp_path = path + '.tmp'
+        try:
+            if self.extension == '.feather':
+                df.reset_index(drop=True).to_feather(tmp_path)
+            else:
+                df.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            self._remove(tmp_path)
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        """删除最久未使用的缓存，直到总大小不超过上限"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.extension):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,49 @@
+from decimal import Decimal, ROUND_HALF_UP
+import numpy as np
+import pandas as pd
+
+# 以整数分保存的金额列
+MONEY_COLUMNS = ['小计金额(结算)', '税额(结算)', '小计价税(结算)']
+# 浮点数乘以100后与整数的误差容限（如1.005 * 100 = 100.49999999999999）
+CENT_TOLERANCE = 1e-6
+
+
+def to_cents(values):
+    """金额（元）转换为整数分，四舍五入到分；无法转换的值为空，返回Int64类型"""
+    values = pd.to_numeric(pd.Series(values), errors='coerce').astype('float64')
+    yuan = values.to_numpy()
+    cents = np.sign(yuan) * np.floor(np.abs(yuan) * 100 + 0.5 + CENT_TOLERANCE)
+    return pd.Series(cents, index=values.index).astype('Int64')
+
+
+def is_cents(series):
+    """该列是否已经由to_cents转换为整数分
+
+    只认to_cents生成的可空Int64类型；读取时全为整数的金额列是int64（元），仍需转换
+    """
+    return isinstance(series.dtype, pd.Int64Dtype)
+
+
+def cents_to_yuan(cents):
+    """整数分转换为元，用于写入单元格；列转换后空值为NaN"""
+    if isinstance(cents, pd.Series):
+        return cents.astype('float64') / 100
+    return int(cents) / 100
+
+
+def cents_to_decimal(cents):
+    """整数分转换为精确的Decimal（元）"""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def yuan_to_cents(value):
+    """单个金额（元）转换为整数分，按十进制四舍五入"""
+    return int(Decimal(str(value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP).scaleb(2))
+
+
+def format_cents(cents):
+    """整数分格式化为两位小数的文字，与'{:.2f}'格式相同"""
+    cents = int(cents)
+    sign = '-' if cents < 0 else ''
+    yuan, fen = divmod(abs(cents), 100)
+    return f"{sign}{yuan}.{fen:02d}"
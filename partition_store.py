@@ -0,0 +1,56 @@
+import os
+import pickle
+import shutil
+import tempfile
+import pandas as pd
+
+
+class PartitionStore:
+    """按分组键把数据行分区写入磁盘临时文件，处理时每次只加载一个分区"""
+
+    def __init__(self, key_columns, base_dir=None):
+        self.key_columns = list(key_columns)
+        self.temp_dir = tempfile.mkdtemp(prefix='recon_partitions_', dir=base_dir)
+        # 分组键 -> 分区文件路径
+        self.partitions = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.partitions)
+
+    def append(self, df):
+        """把一个数据块按分组键追加到各自的分区文件，分组键为空的行会被丢弃"""
+        for key, part in df.groupby(self.key_columns, sort=False, observed=True):
+            path = self.partitions.get(key)
+            if path is None:
+                path = os.path.join(self.temp_dir, f"{len(self.partitions)}.pkl")
+                self.partitions[key] = path
+            # 同一分区的多个数据块依次追加到同一个文件中
+            with open(path, 'ab') as f:
+                pickle.dump(part, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, key):
+        """读取一个分区的全部数据"""
+        frames = []
+        with open(self.partitions[key], 'rb') as f:
+            while True:
+                try:
+                    frames.append(pickle.load(f))
+                except EOFError:
+                    break
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
+
+    def iter_partitions(self):
+        """按分组键顺序逐个返回(分组键, 分区数据)"""
+        for key in sorted(self.partitions):
+            yield key, self.load(key)
+
+    def close(self):
+        """删除所有临时分区文件"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self.partitions = {}
@@ -0,0 +1,115 @@
+"""对账明细表命令行工具：不启动界面，按与界面相同的流程批量生成对账单
+
+示例：
+    python recon_cli.py "exports/*.xlsx" --group-mode supplier-tax --output export --workers 4
+
+日志输出到标准错误，处理结果的统计以JSON格式输出到标准输出。
+没有匹配到任何文件的输入参数（不存在的路径或没有匹配的通配符）逐个记录在日志中，并计入统计结果。
+退出码：0 全部成功；1 有文件或对账单处理失败，或有输入参数没有匹配到文件；2 没有找到任何输入文件或参数错误
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+import multiprocessing
+import grouping
+from statement_pipeline import StatementConfig, StatementPipeline
+from statement_writer import DEFAULT_WRITER_BACKEND, available_writer_backends
+
+# 分组方式的英文别名，便于在脚本和计划任务中使用
+GROUP_MODE_ALIASES = {
+    'supplier': '按供应商',
+    'supplier-tax': '按供应商和税率',
+    'supplier-department': '按供应商和部门',
+    'supplier-week': '按供应商和周',
+}
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def expand_inputs(patterns):
+    """展开输入文件的通配符，保持参数顺序并去掉重复的文件
+
+    返回(输入文件列表, 没有匹配到文件的参数列表)
+    """
+    input_files = []
+    unmatched = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or ([pattern] if os.path.isfile(pattern) else [])
+        if not matches:
+            unmatched.append(pattern)
+        for path in matches:
+            path = os.path.abspath(path)
+            if path not in input_files:
+                input_files.append(path)
+    return input_files, unmatched
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="批量生成供应商对账明细表（不启动界面）")
+    parser.add_argument('inputs', nargs='+', help="收货单商品明细Excel文件，可以使用通配符")
+    parser.add_argument('-g', '--group-mode', default=grouping.DEFAULT_GROUP_MODE,
+                        choices=list(GROUP_MODE_ALIASES) + list(grouping.GROUP_MODES),
+                        help="分组方式（默认：%(default)s）")
+    parser.add_argument('-o', '--output', default="export", help="对账单输出文件夹（默认：%(default)s）")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="并行进程数（默认：CPU核心数）")
+    parser.add_argument('--archive', default="archive", help="处理完成的文件归档到此文件夹（默认：%(default)s）")
+    parser.add_argument('--no-archive', action='store_true', help="不归档原文件")
+    parser.add_argument('--cache', default="cache", help="预处理缓存文件夹（默认：%(default)s）")
+    parser.add_argument('--config', default=None, help="标题信息配置文件（默认：程序所在目录的config.txt）")
+    parser.add_argument('--writer', default=DEFAULT_WRITER_BACKEND, choices=available_writer_backends(),
+                        help="对账单生成方式（默认：%(default)s）")
+    parser.add_argument('--no-cache', action='store_true', help="跳过缓存，重新读取文件")
+    parser.add_argument('--partitioned', action='store_true', help="大文件分区处理（节省内存）")
+    parser.add_argument('--merge', action='store_true', help="合并同月文件")
+    parser.add_argument('--force', action='store_true', help="重新生成全部对账单")
+    parser.add_argument('-q', '--quiet', action='store_true', help="不输出处理日志，只输出统计结果")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        print("并行进程数必须大于0", file=sys.stderr)
+        return EXIT_USAGE
+
+    log = (lambda message: None) if args.quiet else (lambda message: print(message, file=sys.stderr, flush=True))
+    input_files, unmatched = expand_inputs(args.inputs)
+    for pattern in unmatched:
+        log(f"✗ 没有找到匹配的文件：{pattern}")
+    if not input_files:
+        print(json.dumps({'error': "没有找到输入文件", 'inputs': args.inputs, 'unmatched_inputs': unmatched},
+                         ensure_ascii=False))
+        return EXIT_USAGE
+
+    config = StatementConfig(
+        group_mode=GROUP_MODE_ALIASES.get(args.group_mode, args.group_mode),
+        workers=args.workers,
+        bypass_cache=args.no_cache,
+        partitioned=args.partitioned,
+        merge=args.merge,
+        force=args.force,
+        output_folder=args.output,
+        archive_folder=None if args.no_archive else args.archive,
+        cache_folder=args.cache,
+        config_file=args.config,
+        writer_backend=args.writer
+    )
+    stats = StatementPipeline(config, log=log).run(input_files)
+
+    # 没有匹配到文件的参数按失败处理：计划任务中拼错的路径不会被当作成功
+    failed = stats['files_failed'] or stats['statements_failed'] or unmatched
+    summary = dict(stats, inputs_unmatched=len(unmatched), status='failed' if failed else 'ok',
+                   group_mode=config.group_mode, output=os.path.abspath(config.output_folder), inputs=input_files,
+                   unmatched_inputs=unmatched)
+    print(json.dumps(summary, ensure_ascii=False, indent=1))
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+if __name__ == "__main__":
+    # 打包为exe时子进程需要
+    multiprocessing.freeze_support()
+    sys.exit(main())
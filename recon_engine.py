@@ -0,0 +1,218 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import excel_reader
+import money
+from header_schema import apply_column_types
+
+
+# 退货行需要转为负数的金额列
+RETURN_AMOUNT_COLUMNS = ['单价(结算)', '小计金额(结算)', '税额(结算)', '小计价税(结算)']
+
+
+# 对账单合计的金额列（整数分） -> 汇总表中的合计名称
+TOTAL_COLUMNS = {
+    '小计金额(结算)': '小计金额合计',
+    '税额(结算)': '税额合计',
+    '小计价税(结算)': '小计价税合计',
+}
+
+
+def default_workers():
+    """默认的并行进程数：CPU核心数"""
+    return os.cpu_count() or 1
+
+
+def log_header_row(header_row, column_map, schema, log):
+    """记录表头搜索结果，未找到表头时返回False"""
+    if header_row is None:
+        log(f"警告：在前{excel_reader.HEADER_SEARCH_ROWS}行中未找到表头行，请检查是否选择了正确的文件")
+        return False
+    log(f"找到表头行: 第{header_row+1}行，匹配度: {schema.score(column_map)}/{len(schema.required)}")
+    return True
+
+
+def filter_export_columns(df, column_map, schema, log):
+    """检查必要的列并统一列类型，缺少必要的列时返回None"""
+    # 检查是否找到了必要的列（部分导出文件没有单位列，允许缺省）
+    missing_columns = [col for col in schema.missing(column_map) if col != '基本单位']
+    if missing_columns:
+        log(f"警告：文件中缺少必要的列：{', '.join(missing_columns)}，请检查是否选择了正确的文件")
+        return None
+
+    # 读取时已按列位置只取出所需列并统一为标准表头（N-R列已在表头匹配时排除）
+    df_filtered = df
+    if '基本单位' not in column_map:
+        df_filtered.insert(schema.required.index('基本单位'), '基本单位', None)
+
+    # 按列类型定义转换数据（收货日期去掉时间部分，重复文本使用分类类型）
+    df_filtered = apply_column_types(df_filtered)
+
+    return df_filtered.dropna(how='all')
+
+
+def preprocess_excel(file_path, schema, log):
+    """预处理Excel文件，自动搜索表头位置"""
+    try:
+        # 单次读取：在同一个只读流中搜索表头并读取数据
+        header_row, column_map, df = excel_reader.load_excel(file_path, schema)
+        if not log_header_row(header_row, column_map, schema, log):
+            return None
+        return filter_export_columns(df, column_map, schema, log)
+    except Exception as e:
+        log(f"警告：处理文件时出错，请检查是否选择了正确的文件。错误信息：{str(e)}")
+        return None
+
+
+def get_year_month(df, log):
+    """从数据中获取年月信息"""
+    if '收货日期' not in df.columns:
+        log("错误：文件中缺少收货日期列，请检查是否选择了正确的文件。")
+        return None
+
+    try:
+        # 检查收货日期列是否有数据
+        if df['收货日期'].empty or df['收货日期'].isna().all():
+            log("错误：文件中的收货日期列没有任何数据，请检查是否选择了正确的文件。")
+            return None
+
+        earliest_date = pd.to_datetime(df['收货日期'], errors='coerce').min()
+        if pd.isna(earliest_date):
+            log("错误：文件中没有有效的收货日期，请检查是否选择了正确的文件。")
+            return None
+
+        return earliest_date.strftime('%Y-%m')
+    except Exception as e:
+        log(f"错误：处理收货日期时出错，请检查是否选择了正确的文件。错误信息：{str(e)}")
+        return None
+
+
+def merge_frames(frames):
+    """合并同一月份多个文件的预处理数据，去掉在多个文件中重复出现的行
+
+    同一文件内完全相同的行是不同的记录（如同一订单中重复的商品行），按出现次数区分后予以保留
+    """
+    marked = []
+    for df in frames:
+        df = df.reset_index(drop=True)
+        occurrence = df.groupby(list(df.columns), dropna=False, observed=True, sort=False).cumcount()
+        marked.append(df.assign(_occurrence=occurrence))
+    df_merged = pd.concat(marked, ignore_index=True).drop_duplicates().drop(columns='_occurrence')
+    # 各文件的分类列类别不同，合并后重新统一类型
+    return apply_column_types(df_merged)
+
+
+def format_tax_rate(rate):
+    """税率转换为百分比文字，如0.13转为13%，空值为0%"""
+    return f"{int(float(rate) * 100)}%" if pd.notna(rate) else '0%'
+
+
+def apply_return_signs(df):
+    """退货行的金额转为负数，返回新的DataFrame；结算金额列为整数分，转换是精确的"""
+    if '退货' not in df.columns:
+        return df
+    is_return = (df['退货'] == '是').to_numpy(dtype=bool)
+    return df.assign(**{col: df[col].mask(is_return, -df[col].abs()) for col in RETURN_AMOUNT_COLUMNS})
+
+
+def prepare_statement_rows(df, columns):
+    """分组之前对整个数据一次性整理出写入对账单的内容
+
+    收货日期格式化为文字，税率转换为百分比，整数分的金额转换为元（退货金额已由apply_return_signs转为负数）；
+    返回只包含对账单列、空值为空字符串的DataFrame，与df的行一一对应
+    """
+    df_statement = df.reindex(columns=columns)
+    df_statement['收货日期'] = pd.to_datetime(df_statement['收货日期'], errors='coerce').dt.strftime('%Y-%m-%d')
+
+    # 税率只有少数几种，按不重复的值查表转换
+    rates = df_statement['税率']
+    lookup = {rate: format_tax_rate(rate) for rate in rates.dropna().unique()}
+    df_statement['税率'] = rates.map(lookup).fillna('0%')
+
+    # 金额只在写入单元格时才由整数分转换为元
+    for col in money.MONEY_COLUMNS:
+        df_statement[col] = money.cents_to_yuan(df_statement[col])
+
+    return df_statement.astype(object).fillna('')
+
+
+def summarize_groups(df, groups):
+    """根据split_groups得到的各分组连续行范围，一次性计算所有分组的汇总：
+    三项金额合计（整数分，退货已为负数）、最早和最晚收货日期、收货月份数和行数
+
+    分组内的行已按收货日期排序（空日期在最后），返回与groups顺序一致的汇总列表
+    """
+    if not groups:
+        return []
+    # 每个分组的起止位置交替排列，reduceat的偶数位结果即为各分组的归约值
+    bounds = np.array([[rows.start, rows.stop] for _, rows in groups]).ravel()
+
+    def reduce(ufunc, values, fill):
+        return ufunc.reduceat(np.append(values, fill), bounds)[::2]
+
+    summaries = [{'行数': rows.stop - rows.start} for _, rows in groups]
+    for col, name in TOTAL_COLUMNS.items():
+        totals = reduce(np.add, df[col].fillna(0).to_numpy(dtype='int64'), 0)
+        for summary, total in zip(summaries, totals):
+            summary[name] = int(total)
+
+    dates = pd.to_datetime(df['收货日期'], errors='coerce')
+    valid = dates.notna().to_numpy()
+    ticks = dates.to_numpy(dtype='datetime64[ns]').view('int64')
+    max_tick = np.iinfo('int64').max
+    earliest = reduce(np.minimum, np.where(valid, ticks, max_tick), max_tick)
+    latest = reduce(np.maximum, np.where(valid, ticks, -max_tick), -max_tick)
+
+    # 分组内日期有序，月份与上一行不同（或是分组的第一行）即为新的月份
+    months = np.where(valid, dates.dt.year.to_numpy(na_value=0) * 12 + dates.dt.month.to_numpy(na_value=0), -1)
+    new_month = valid & (months != np.roll(months, 1))
+    starts = bounds[::2]
+    new_month[starts] = valid[starts]
+    month_counts = reduce(np.add, new_month.astype('int64'), 0)
+
+    for summary, first, last, count in zip(summaries, earliest, latest, month_counts):
+        summary['最早收货日期'] = pd.Timestamp(first) if first != max_tick else pd.NaT
+        summary['最晚收货日期'] = pd.Timestamp(last) if last != -max_tick else pd.NaT
+        summary['收货月份数'] = int(count)
+    return summaries
+
+
+def preprocess_file(file_path, schema):
+    """预处理单个文件并获取年月，返回(DataFrame, 年月, 日志列表)
+
+    作为子进程的入口，日志不直接输出，而是收集后交给主进程按文件顺序显示
+    """
+    messages = []
+    df = preprocess_excel(file_path, schema, messages.append)
+    year_month = get_year_month(df, messages.append) if df is not None else None
+    return df, year_month, messages
+
+
+def preprocess_files(file_paths, schema, workers=None):
+    """用进程池并行预处理多个文件，返回按输入顺序产生(DataFrame, 年月, 日志列表)的迭代器
+
+    调用时所有文件立即提交到进程池；前面的文件完成后即可取出，调用方可以边处理边等待后面的文件
+    """
+    file_paths = list(file_paths)
+    workers = min(workers or default_workers(), len(file_paths))
+    if workers <= 1:
+        return (preprocess_file(file_path, schema) for file_path in file_paths)
+
+    # 使用spawn方式启动子进程，Windows和打包后的程序行为一致
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    futures = [pool.submit(preprocess_file, file_path, schema) for file_path in file_paths]
+    return _iter_results(pool, futures)
+
+
+def _iter_results(pool, futures):
+    """按提交顺序取出子进程的结果，结束或中途放弃时关闭进程池"""
+    try:
+        for future in futures:
+            try:
+                yield future.result()
+            except Exception as e:
+                yield None, None, [f"警告：处理文件时出错，请检查是否选择了正确的文件。错误信息：{str(e)}"]
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,65 @@
+import os
+import json
+import hashlib
+import pandas as pd
+
+# 清单文件名，保存在每个年月文件夹中
+MANIFEST_NAME = '.manifest.json'
+# 对账单的内容或格式发生变化时递增，使旧清单失效、所有对账单重新生成
+MANIFEST_VERSION = 2
+
+
+def fingerprint(df_processed, header_rows, writer_backend):
+    """计算对账单内容指纹：写入Excel的数据行、标题行和生成方式都相同时指纹相同
+
+    生成方式不同时文件格式不同（如紧凑模式），更换生成方式后对账单重新生成
+    """
+    digest = hashlib.sha1()
+    digest.update(json.dumps([MANIFEST_VERSION, writer_backend, header_rows, list(df_processed.columns)],
+                             ensure_ascii=False).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df_processed, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class StatementManifest:
+    """年月文件夹中各对账单的内容指纹清单，重新处理时只生成内容发生变化的对账单"""
+
+    def __init__(self, folder):
+        self.path = os.path.join(folder, MANIFEST_NAME)
+        self.entries = self._read()
+        self.unchanged = 0
+        self.modified = False
+
+    def _read(self):
+        """读取清单，文件不存在、损坏或版本不一致时返回空清单"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+            return {}
+        return data.get('entries', {})
+
+    def is_unchanged(self, output_filepath, file_fingerprint):
+        """对账单文件存在且内容指纹与上次生成时相同"""
+        name = os.path.basename(output_filepath)
+        if self.entries.get(name) == file_fingerprint and os.path.exists(output_filepath):
+            self.unchanged += 1
+            return True
+        return False
+
+    def update(self, output_filepath, file_fingerprint):
+        """记录新生成的对账单的内容指纹"""
+        self.entries[os.path.basename(output_filepath)] = file_fingerprint
+        self.modified = True
+
+    def save(self):
+        """有变化时写回清单文件，先写临时文件再替换，避免中断时损坏"""
+        if not self.modified:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+        self.modified = False
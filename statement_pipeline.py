@@ -0,0 +1,511 @@
+import os
+import time
+import shutil
+from datetime import datetime
+import pandas as pd
+import excel_reader
+import recon_engine
+import grouping
+from ingest_cache import IngestCache
+from partition_store import PartitionStore
+from statement_manifest import StatementManifest, fingerprint
+from statement_writer import DEFAULT_WRITER_BACKEND, WRITER_BACKENDS, available_writer_backends, create_writer, write_statements
+from header_schema import HeaderSchema, RETURN_COLUMNS
+from app_paths import default_config_file
+
+# 对账单的列（期望的表头字段）
+EXPECTED_HEADERS = [
+    "收货日期", "订单号", "商品名称", "实收数量", "基本单位",
+    "单价(结算)", "小计金额(结算)", "税额(结算)", "小计价税(结算)", "部门",
+    "税率", "供应商/备用金报销账户", "商品分类"
+]
+
+# 表头结构：必需列、退货相关的可选列，以及需要排除的N-R列（索引13-16）
+HEADER_SCHEMA = HeaderSchema(EXPECTED_HEADERS, optional=RETURN_COLUMNS, excluded_positions=range(13, 17))
+
+
+def load_header_rows(config_file, log):
+    """获取配置文件中的标题信息"""
+    try:
+        if not os.path.exists(config_file):
+            log("警告：未找到config.txt文件,将会导致对账单标题错误")
+            return []
+
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = dict(line.split(':', 1) for line in f if ':' in line)
+
+        hotelname = config.get('hotelname', '').strip()
+        sheet_title = config.get('Sheet_tittle', '').strip()
+
+        return [
+            [''] * 5 + [hotelname] + [''] * 7,
+            [''] * 5 + [sheet_title] + [''] * 7,
+            [''] * 13,
+            [''] * 13,
+            [''] * 13
+        ]
+    except Exception as e:
+        log(f"读取配置文件时出错: {str(e)}")
+        return []
+
+
+class StatementConfig:
+    """对账单生成的设置，界面和命令行使用相同的设置项"""
+
+    def __init__(self, group_mode=grouping.DEFAULT_GROUP_MODE, workers=None, bypass_cache=False, partitioned=False,
+                 merge=False, force=False, output_folder="export", archive_folder="archive", cache_folder="cache",
+                 config_file=None, writer_backend=DEFAULT_WRITER_BACKEND):
+        if group_mode not in grouping.GROUP_MODES:
+            raise ValueError(f"未知的分组方式：{group_mode}")
+        if writer_backend not in WRITER_BACKENDS:
+            raise ValueError(f"未知的对账单生成方式：{writer_backend}")
+        if writer_backend not in available_writer_backends():
+            raise ValueError(f"对账单生成方式 {writer_backend} 不可用")
+        self.group_mode = group_mode
+        # 并行进程数，为空时使用CPU核心数
+        self.workers = workers or recon_engine.default_workers()
+        # 跳过缓存，重新读取文件
+        self.bypass_cache = bypass_cache
+        # 大文件分区处理（节省内存）
+        self.partitioned = partitioned
+        # 合并同月文件
+        self.merge = merge
+        # 重新生成全部对账单
+        self.force = force
+        self.output_folder = output_folder
+        # 为None时不归档原文件
+        self.archive_folder = archive_folder
+        self.cache_folder = cache_folder
+        self.config_file = config_file or default_config_file()
+        # 对账单生成方式，见statement_writer.WRITER_BACKENDS
+        self.writer_backend = writer_backend
+
+
+class StatementPipeline:
+    """对账单生成流程：读取、整理、分组并写入对账单，不依赖界面
+
+    日志和进度通过回调输出：log(消息)，progress(0-100的整数)；回调在处理线程中调用
+    """
+
+    def __init__(self, config, log=print, progress=None):
+        self.config = config
+        self.log = log
+        self.progress = progress or (lambda value: None)
+        self.expected_headers = EXPECTED_HEADERS
+        self.header_schema = HEADER_SCHEMA
+        # 当前年月文件夹的对账单内容指纹清单
+        self.manifest = None
+        self.current_file_index = 0
+        self.total_files = 0
+        self.stats = {}
+
+    def log_message(self, message):
+        """输出日志并统计警告和错误数量"""
+        if message.startswith("警告："):
+            self.stats['warnings'] += 1
+        elif message.startswith("错误："):
+            self.stats['errors'] += 1
+        self.log(message)
+
+    def run(self, input_files):
+        """处理所有输入文件，返回处理结果的统计"""
+        start_time = time.time()
+        config = self.config
+        self.stats = {
+            'files': len(input_files), 'files_failed': 0,
+            'statements_written': 0, 'statements_unchanged': 0, 'statements_failed': 0,
+            'warnings': 0, 'errors': 0, 'months': [],
+        }
+
+        # 创建必要的文件夹
+        for folder in (config.output_folder, config.archive_folder, config.cache_folder):
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+
+        # 获取配置信息
+        header_rows = load_header_rows(config.config_file, self.log_message)
+
+        # 预处理结果缓存
+        cache = IngestCache(config.cache_folder)
+
+        # 批量处理文件
+        total_files = len(input_files)
+        self.current_file_index = 0
+        self.total_files = total_files
+
+        self.log_message(f"开始批量处理 {total_files} 个文件...")
+
+        # 非分区模式下所有文件并行预处理，结果按输入顺序取出
+        preprocessed = None if config.partitioned else self.iter_preprocessed(input_files, cache)
+
+        if config.merge and preprocessed is None:
+            self.log_message("提示：分区处理模式下不合并同月文件，将逐个处理")
+
+        if config.merge and preprocessed is not None:
+            # 合并同月文件，每个对账单只生成一次
+            self.process_files_merged(input_files, preprocessed, header_rows)
+        else:
+            for index, input_file in enumerate(input_files, 1):
+                try:
+                    self.current_file_index = index
+                    self.log_message(f"\n[{index}/{total_files}] 正在处理: {os.path.basename(input_file)}")
+                    self.progress(int(((index - 1) / total_files) * 100))
+                    if preprocessed is None:
+                        # 大文件分区处理
+                        if not self.process_file_partitioned(input_file, header_rows):
+                            self.stats['files_failed'] += 1
+                            continue
+                    else:
+                        df_filtered, year_month, messages = next(preprocessed)
+                        for message in messages:
+                            self.log_message(message)
+                        if df_filtered is None:  # 预处理失败
+                            self.stats['files_failed'] += 1
+                            continue
+
+                        # 检查年月信息
+                        if not year_month:
+                            self.log_message("错误：无法从文件中获取有效的收货日期，请检查是否选择了正确的文件。")
+                            self.stats['files_failed'] += 1
+                            continue
+
+                        # 创建年月文件夹
+                        year_month_folder = os.path.join(config.output_folder, year_month)
+                        os.makedirs(year_month_folder, exist_ok=True)
+
+                        # 分组并处理数据（带进度更新）
+                        self.process_grouped_data(df_filtered, year_month, year_month_folder, header_rows)
+
+                    # 归档文件
+                    self.archive_files([input_file])
+
+                    # 更新完整进度
+                    self.update_progress(index, total_files)
+
+                except Exception as e:
+                    self.log_message(f"✗ 处理文件 {os.path.basename(input_file)} 时出错: {str(e)}")
+                    self.stats['files_failed'] += 1
+
+        # 计算处理时间
+        processing_time = time.time() - start_time
+        self.log_message(f"\n处理完成！总耗时: {processing_time:.2f} 秒")
+
+        # 确保进度条显示100%
+        self.progress(100)
+
+        self.stats['seconds'] = round(processing_time, 2)
+        return self.stats
+
+    def preprocess_excel(self, file_path):
+        """预处理Excel文件，自动搜索表头位置"""
+        return recon_engine.preprocess_excel(file_path, self.header_schema, self.log_message)
+
+    def log_header_row(self, header_row, column_map):
+        """记录表头搜索结果，未找到表头时返回False"""
+        return recon_engine.log_header_row(header_row, column_map, self.header_schema, self.log_message)
+
+    def filter_export_columns(self, df, column_map):
+        """检查必要的列并统一列类型，缺少必要的列时返回None"""
+        return recon_engine.filter_export_columns(df, column_map, self.header_schema, self.log_message)
+
+    def get_year_month(self, df):
+        """从数据中获取年月信息"""
+        return recon_engine.get_year_month(df, self.log_message)
+
+    def iter_preprocessed(self, input_files, cache):
+        """按输入顺序逐个返回各文件的(DataFrame, 年月, 日志列表)
+
+        文件未变化时直接使用缓存，其余文件交给进程池并行预处理；
+        日志先收集起来，由调用方在处理到该文件时输出，保证顺序固定
+        """
+        bypass_cache = self.config.bypass_cache
+        entries = []
+        for file_path in input_files:
+            messages = []
+            try:
+                key = cache.make_key(file_path)
+            except OSError as e:
+                messages.append(f"无法读取文件信息，跳过缓存: {str(e)}")
+                key = None
+            cached = key is not None and not bypass_cache and cache.contains(key)
+            entries.append((file_path, key, cached, messages))
+
+        # 未命中缓存的文件立即提交到进程池
+        results = recon_engine.preprocess_files(
+            [file_path for file_path, _, cached, _ in entries if not cached],
+            self.header_schema,
+            self.config.workers
+        )
+
+        for file_path, key, cached, messages in entries:
+            df_filtered = cache.load(key) if cached else None
+            if df_filtered is not None:
+                messages.append(f"  → 文件未变化，使用缓存数据: {len(df_filtered)} 条记录")
+                year_month = recon_engine.get_year_month(df_filtered, messages.append)
+                yield df_filtered, year_month, messages
+                continue
+
+            if cached:
+                # 缓存文件已损坏，在当前进程中重新读取
+                df_filtered, year_month, file_messages = recon_engine.preprocess_file(file_path, self.header_schema)
+            else:
+                df_filtered, year_month, file_messages = next(results)
+            messages.extend(file_messages)
+            if df_filtered is not None and key is not None and not cache.store(key, df_filtered):
+                messages.append("  → 写入缓存失败，下次将重新读取文件")
+            yield df_filtered, year_month, messages
+
+    def process_file_partitioned(self, file_path, header_rows):
+        """分区处理大文件：分批读取数据并按分组写入磁盘分区，再逐个分区生成对账单，
+        内存占用以最大的分组为上限，而不是整个文件"""
+        key_columns, filename_template, group_label = grouping.GROUP_MODES[self.config.group_mode]
+
+        try:
+            header_row, column_map, chunks = excel_reader.iter_excel_chunks(file_path, self.header_schema)
+            if not self.log_header_row(header_row, column_map):
+                return False
+
+            with PartitionStore(key_columns) as store:
+                # 分批读取并写入分区，同时记录每批的最早收货日期
+                earliest_dates = []
+                for chunk_index, chunk in enumerate(chunks, 1):
+                    df_chunk = self.filter_export_columns(chunk, column_map)
+                    if df_chunk is None:
+                        return False
+                    earliest_dates.append(df_chunk['收货日期'].min())
+                    store.append(grouping.add_group_columns(df_chunk, key_columns))
+                    self.log_message(f"  → 已读取第 {chunk_index} 批数据: {len(df_chunk)} 条记录")
+
+                # 获取年月信息
+                year_month = self.get_year_month(pd.DataFrame({'收货日期': earliest_dates}))
+                if not year_month:
+                    self.log_message("错误：无法从文件中获取有效的收货日期，请检查是否选择了正确的文件。")
+                    return False
+
+                # 创建年月文件夹
+                year_month_folder = os.path.join(self.config.output_folder, year_month)
+                os.makedirs(year_month_folder, exist_ok=True)
+                self.add_month(year_month)
+
+                total_groups = len(store)
+                self.log_message(f"共 {total_groups} 个{group_label}（分区处理）")
+                self.manifest = StatementManifest(year_month_folder)
+
+                # 每次只加载一个分区，排序后生成对账单
+                self.write_group_statements(self.iter_partition_groups(store, key_columns), total_groups, year_month,
+                                            year_month_folder, header_rows, key_columns, filename_template)
+                self.save_manifest()
+            return True
+        except Exception as e:
+            self.log_message(f"警告：分区处理文件时出错，请检查是否选择了正确的文件。错误信息：{str(e)}")
+            return False
+
+    def process_files_merged(self, input_files, preprocessed, header_rows):
+        """合并模式：同一月份的所有文件合并去重后只分组一次，每个对账单每次运行只生成一次"""
+        total_files = len(input_files)
+
+        # 年月 -> [(文件路径, 预处理数据)]，按首次出现的顺序排列
+        months = {}
+        for index, input_file in enumerate(input_files, 1):
+            try:
+                self.log_message(f"\n[{index}/{total_files}] 正在读取: {os.path.basename(input_file)}")
+                df_filtered, year_month, messages = next(preprocessed)
+                for message in messages:
+                    self.log_message(message)
+                if df_filtered is None:  # 预处理失败
+                    self.stats['files_failed'] += 1
+                    continue
+                if not year_month:
+                    self.log_message("错误：无法从文件中获取有效的收货日期，请检查是否选择了正确的文件。")
+                    self.stats['files_failed'] += 1
+                    continue
+                months.setdefault(year_month, []).append((input_file, df_filtered))
+            except Exception as e:
+                self.log_message(f"✗ 处理文件 {os.path.basename(input_file)} 时出错: {str(e)}")
+                self.stats['files_failed'] += 1
+
+        # 分组进度按月份计算
+        self.total_files = len(months)
+        for month_index, (year_month, entries) in enumerate(months.items(), 1):
+            try:
+                self.current_file_index = month_index
+                df_merged = recon_engine.merge_frames([df for _, df in entries])
+                total_rows = sum(len(df) for _, df in entries)
+                self.log_message(f"\n[{year_month}] 合并 {len(entries)} 个文件: {total_rows} 条记录，去重后 {len(df_merged)} 条记录")
+
+                # 创建年月文件夹
+                year_month_folder = os.path.join(self.config.output_folder, year_month)
+                os.makedirs(year_month_folder, exist_ok=True)
+
+                # 分组并处理数据（带进度更新）
+                self.process_grouped_data(df_merged, year_month, year_month_folder, header_rows)
+
+                # 归档该月份的所有文件
+                self.archive_files([input_file for input_file, _ in entries])
+
+                # 更新完整进度
+                self.update_progress(month_index, len(months))
+
+            except Exception as e:
+                self.log_message(f"✗ 处理 {year_month} 的数据时出错: {str(e)}")
+                self.stats['files_failed'] += len(entries)
+
+    def process_grouped_data(self, df, year_month, year_month_folder, header_rows):
+        """处理分组数据"""
+        self.add_month(year_month)
+        # 根据选择的分组方式确定分组列和文件名模板
+        key_columns, filename_template, group_label = grouping.GROUP_MODES[self.config.group_mode]
+        if not all(col in df.columns for col in grouping.SORT_COLUMNS):
+            self.log_message("警告：文件中缺少排序所需的列，将不按顺序处理数据。")
+
+        # 排序后一次算出所有分组的行范围，各分组直接按位置切片
+        df = grouping.add_group_columns(df, key_columns)
+        df, groups = grouping.split_groups(df, key_columns)
+
+        # 分组之前一次性整理出写入对账单的内容，各分组直接取用
+        df = recon_engine.apply_return_signs(df)
+        df_statement = recon_engine.prepare_statement_rows(df, self.expected_headers)
+        # 所有分组的合计、收货日期范围和月份数一次算出，写入对账单和跨月检查时直接使用
+        summaries = recon_engine.summarize_groups(df, groups)
+
+        self.manifest = StatementManifest(year_month_folder)
+
+        total_groups = len(groups)
+        self.log_message(f"共 {total_groups} 个{group_label}")
+
+        group_items = ((group_key, df_statement.iloc[rows], summary) for (group_key, rows), summary in zip(groups, summaries))
+        self.write_group_statements(group_items, total_groups, year_month, year_month_folder, header_rows,
+                                    key_columns, filename_template)
+
+        self.save_manifest()
+
+    def add_month(self, year_month):
+        """记录生成了对账单的年月"""
+        if year_month not in self.stats['months']:
+            self.stats['months'].append(year_month)
+
+    def is_statement_unchanged(self, output_filepath, file_fingerprint):
+        """对账单内容与上次生成时相同时记录日志并返回True；选择重新生成全部对账单时总是返回False"""
+        if self.manifest is None or self.config.force:
+            return False
+        if not self.manifest.is_unchanged(output_filepath, file_fingerprint):
+            return False
+        self.stats['statements_unchanged'] += 1
+        self.log_message(f"○ 内容未变化，跳过 {os.path.basename(output_filepath)}")
+        return True
+
+    def save_manifest(self):
+        """保存当前年月文件夹的内容指纹清单，并汇总跳过的对账单数量"""
+        if self.manifest is None:
+            return
+        if self.manifest.unchanged:
+            self.log_message(f"  → {self.manifest.unchanged} 个对账单内容未变化，未重新生成")
+        try:
+            self.manifest.save()
+        except OSError as e:
+            self.log_message(f"保存对账单清单时出错，下次将重新生成全部对账单: {str(e)}")
+        self.manifest = None
+
+    def archive_files(self, input_files):
+        """归档处理完的文件，未设置归档文件夹时保留原文件"""
+        if not self.config.archive_folder:
+            return
+        self.log_message("  → 归档原文件")
+        for input_file in input_files:
+            self.archive_file(input_file, self.config.archive_folder)
+
+    def archive_file(self, input_file, archive_folder):
+        """归档处理完的文件"""
+        try:
+            base_name = os.path.basename(input_file)
+            archive_path = os.path.join(archive_folder, base_name)
+
+            # 如果文件已存在，添加时间戳
+            if os.path.exists(archive_path):
+                base, ext = os.path.splitext(base_name)
+                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+                archive_path = os.path.join(archive_folder, f"{base}_{timestamp}{ext}")
+
+            shutil.move(input_file, archive_path)
+            self.log_message(f"已成功归档文件 {base_name}")
+        except Exception as e:
+            self.log_message(f"归档文件时出错: {str(e)}")
+
+    def update_progress(self, current, total):
+        """更新进度（文件级别）"""
+        self.progress(int((current / total) * 100))
+
+    def update_detailed_progress(self, current_group, total_groups):
+        """更新详细进度（分组级别）"""
+        if not self.total_files:
+            return
+
+        # 计算当前文件的基础进度
+        file_base_progress = ((self.current_file_index - 1) / self.total_files) * 100
+
+        # 计算当前文件内的分组进度
+        group_progress = (current_group / total_groups) * (100 / self.total_files)
+
+        # 总进度 = 已完成文件的进度 + 当前文件内的进度，确保进度不超过100%
+        self.progress(int(min(file_base_progress + group_progress, 100)))
+
+    def iter_partition_groups(self, store, key_columns):
+        """逐个加载分区并整理为写入对账单的内容，产生(分组键, 分组数据, 汇总)"""
+        for group_key, group_data in store.iter_partitions():
+            group_data, (group,) = grouping.split_groups(group_data, key_columns)
+            group_data = recon_engine.apply_return_signs(group_data)
+            df_statement = recon_engine.prepare_statement_rows(group_data, self.expected_headers)
+            summary, = recon_engine.summarize_groups(group_data, [group])
+            yield group_key, df_statement, summary
+
+    def write_group_statements(self, group_items, total_groups, year_month, year_month_folder, header_rows, key_columns, filename_template):
+        """生成各分组的对账单：处理线程检查跨月并跳过内容未变化的对账单，
+        工作簿的生成、样式和保存交给进程池，处理线程按分组顺序收集结果、记录日志和更新进度"""
+        writer = create_writer(self.config.writer_backend, self.expected_headers)
+        workers = min(self.config.workers, total_groups)
+        tasks = self.iter_statement_tasks(group_items, total_groups, year_month, year_month_folder, header_rows,
+                                          key_columns, filename_template)
+        for (group_index, group_key, file_fingerprint), output_filepath, error in write_statements(writer, tasks, workers):
+            self.update_detailed_progress(group_index, total_groups)
+            if error is not None:
+                self.stats['statements_failed'] += 1
+                self.log_message(f"✗ 处理供应商 {grouping.describe_group(key_columns, group_key)} 的数据时出错: {error}")
+                continue
+            if self.manifest is not None:
+                self.manifest.update(output_filepath, file_fingerprint)
+            self.stats['statements_written'] += 1
+            self.log_message(f"✓ {os.path.basename(output_filepath)}")
+
+    def iter_statement_tasks(self, group_items, total_groups, year_month, year_month_folder, header_rows, key_columns, filename_template):
+        """按分组产生写入任务：(标记, 分组数据, 汇总, 标题行, 文件路径)，内容未变化的分组不产生任务"""
+        for group_index, (group_key, group_data, summary) in enumerate(group_items, 1):
+            try:
+                df_processed, output_filepath = self.prepare_group_data(group_key, group_data, year_month, year_month_folder, summary,
+                                                                        key_columns, filename_template)
+                file_fingerprint = fingerprint(df_processed, header_rows, self.config.writer_backend)
+            except Exception as e:
+                self.update_detailed_progress(group_index, total_groups)
+                self.stats['statements_failed'] += 1
+                self.log_message(f"✗ 处理供应商 {grouping.describe_group(key_columns, group_key)} 的数据时出错: {str(e)}")
+                continue
+            if self.is_statement_unchanged(output_filepath, file_fingerprint):
+                self.update_detailed_progress(group_index, total_groups)
+                continue
+            yield (group_index, group_key, file_fingerprint), df_processed, summary, header_rows, output_filepath
+
+    def prepare_group_data(self, group_key, group_data, year_month, year_month_folder, summary, key_columns, filename_template):
+        """检查跨月并按文件名模板构建文件路径，分组数据在分组前已整理为可直接写入的内容"""
+        # 检查跨月（按汇总表中的月份数判断，只有跨月时才列出具体月份）
+        if summary['收货月份数'] > 1:
+            unique_months = self.get_receipt_months(group_data)
+            self.log_message(f"警告：供应商 {grouping.describe_group(key_columns, group_key)} 的收货日期包含跨月数据，请核查。包含的月份有：{', '.join(unique_months)}")
+
+        # 构建文件路径
+        filename = grouping.build_filename(filename_template, year_month, key_columns, group_key)
+        output_filepath = os.path.join(year_month_folder, filename)
+
+        return group_data, output_filepath
+
+    def get_receipt_months(self, group_data):
+        """分组数据中出现的收货月份（收货日期已格式化为YYYY-MM-DD）"""
+        return [month for month in group_data['收货日期'].str[:7].unique() if month]
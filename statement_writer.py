@@ -0,0 +1,653 @@
+import gc
+import io
+import calendar
+import zipfile
+import functools
+import collections
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import Cell, WriteOnlyCell
+from openpyxl.utils import get_column_letter, coordinate_to_tuple
+from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.utils.indexed_list import IndexedList
+from openpyxl.styles.named_styles import NamedStyleList
+from openpyxl.styles.differential import DifferentialStyleList
+from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
+from openpyxl.worksheet.page import PageMargins
+import money
+from style_registry import StyleRegistry
+
+try:
+    import xlsxwriter
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
+# 会计专用格式
+ACCOUNTING_FORMAT = '_-* #,##0.00_-;-* #,##0.00_-;_-* "-"??_-;_-@_-'
+# 合计行中使用会计格式的金额列
+TOTAL_AMOUNT_HEADERS = ["小计金额(结算)", "税额(结算)", "小计价税(结算)"]
+# 前7行使用表头区域的样式（第7行通常是第一行数据，也按表头处理）
+HEADER_ZONE_ROWS = 7
+# 表头区域的固定文字（供应商名称、对账周期和合计）所在的最后一行
+SUMMARY_LAST_ROW = 5
+# 列宽（按列名）
+COLUMN_WIDTHS = {
+    '订单号': 35, '收货日期': 18, '商品名称': 30, '实收数量': 12, '基本单位': 12,
+    '单价(结算)': 24, '小计金额(结算)': 24, '税额(结算)': 20, '小计价税(结算)': 20,
+    '部门': 20, '供应商/备用金报销账户': 36, '商品分类': 24
+}
+# 第一行、第二行和表头行的行高
+ROW_HEIGHTS = {1: 26, 2: 26, 6: 30}
+# 数据行的命名样式，data_row_styles按序号返回
+DATA_ROW_STYLES = ('data', 'data-even', 'return-row', 'data-negative')
+# 按列推断的类型：数值列直接比较，其余类型的列（文字、日期等）没有负数
+_NUMERIC_KINDS = {'integer', 'floating', 'mixed-integer-float'}
+_NON_NUMERIC_KINDS = {'string', 'empty', 'boolean', 'decimal', 'categorical', 'bytes',
+                      'date', 'datetime', 'datetime64', 'time', 'timedelta', 'timedelta64', 'period', 'interval'}
+
+_HEADER_FONT = Font(color='000000', size=13, name='微软雅黑', bold=False)
+_DATA_FONT = Font(size=13, name='微软雅黑')
+_TOTAL_FONT = Font(color='000000', size=13, name='微软雅黑', bold=True)
+_NEGATIVE_FONT = Font(size=13, name='微软雅黑', color='FF0000')
+_THIN_BLACK = Side(style='thin', color='000000')
+_HAIR_GREY = Side(style='hair', color='D3D3D3')
+_DATA_BORDER = Border(left=_HAIR_GREY, right=_HAIR_GREY, top=_HAIR_GREY, bottom=_HAIR_GREY)
+_CENTER = Alignment(horizontal="center", vertical="center")
+_RIGHT = Alignment(horizontal="right", vertical="center")
+_EVEN_ROW_FILL = PatternFill(start_color='F5F5F5', end_color='F5F5F5', fill_type='solid')
+_RETURN_ROW_FILL = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')
+
+# 对账单的命名样式：表头区域（前7行）、数据行（偶数行浅灰色背景，有负数的退货行黄色背景、负数红色）和合计行
+STATEMENT_STYLES = StyleRegistry({
+    'header': dict(font=_HEADER_FONT, alignment=_CENTER),
+    'header-rule': dict(font=_HEADER_FONT, alignment=_CENTER, border=Border(bottom=_THIN_BLACK)),
+    'header-info': dict(font=_HEADER_FONT, alignment=_RIGHT),
+    'header-columns': dict(font=_HEADER_FONT, alignment=_CENTER, border=Border(top=_THIN_BLACK, bottom=_THIN_BLACK)),
+    'header-columns-amount': dict(font=_HEADER_FONT, alignment=_RIGHT,
+                                  border=Border(top=_THIN_BLACK, bottom=_THIN_BLACK)),
+    'data': dict(font=_DATA_FONT, alignment=_CENTER, border=_DATA_BORDER),
+    'data-even': dict(font=_DATA_FONT, alignment=_CENTER, border=_DATA_BORDER, fill=_EVEN_ROW_FILL),
+    'return-row': dict(font=_DATA_FONT, alignment=_CENTER, border=_DATA_BORDER, fill=_RETURN_ROW_FILL),
+    'data-negative': dict(font=_NEGATIVE_FONT, alignment=_CENTER, border=_DATA_BORDER, fill=_RETURN_ROW_FILL),
+    'totals': dict(font=_TOTAL_FONT, alignment=_CENTER, border=Border(top=_THIN_BLACK)),
+    'totals-even': dict(font=_TOTAL_FONT, alignment=_CENTER, border=Border(top=_THIN_BLACK), fill=_EVEN_ROW_FILL),
+    'totals-amount': dict(font=_TOTAL_FONT, alignment=_RIGHT, border=Border(top=_THIN_BLACK),
+                          number_format=ACCOUNTING_FORMAT),
+    'totals-amount-even': dict(font=_TOTAL_FONT, alignment=_RIGHT, border=Border(top=_THIN_BLACK),
+                               number_format=ACCOUNTING_FORMAT, fill=_EVEN_ROW_FILL),
+})
+
+
+class RowPlan:
+    """对账单各行的用途和数据行的样式标记：由标题行数和分组数据直接计算，设置样式时不需要从工作表中读取"""
+
+    def __init__(self, header_count, negative):
+        self.columns_row = header_count + 1  # 列标题行
+        self.first_data_row = header_count + 2  # 第一行数据
+        self.total_row = header_count + len(negative) + 2  # 合计行
+        # 没有标题行的小分组，表头区域的固定文字也会写到第5行
+        self.max_row = max(self.total_row, SUMMARY_LAST_ROW)
+        # 数据行中的负数单元格（行数×列数的布尔数组），有负数的行为退货行
+        self.negative = negative
+        self.return_rows = negative.any(axis=1)
+        # 按工作表中的行号，偶数行使用浅灰色背景
+        self.even_rows = np.arange(self.first_data_row, self.total_row) % 2 == 0
+
+    def is_data_row(self, row_num):
+        """是否按数据行设置样式：表头区域之后、合计行之前"""
+        return HEADER_ZONE_ROWS < row_num < self.total_row
+
+    def is_total_row(self, row_num):
+        """是否按合计行设置样式：合计行位于表头区域时使用表头区域的样式"""
+        return row_num == self.total_row > HEADER_ZONE_ROWS
+
+
+class StatementWriter:
+    """生成单个对账单工作簿：写入内容、应用样式并保存
+
+    不依赖界面，可以在子进程中使用；对象只保存对账单的列，可以传给子进程
+    """
+
+    # 当前环境中是否可以使用（依赖是否已安装）
+    available = True
+
+    def __init__(self, expected_headers):
+        self.expected_headers = list(expected_headers)
+
+    def write(self, df_processed, summary, header_rows, output_filepath):
+        """生成并保存一个对账单文件"""
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Statement"
+        plan = self.row_plan(df_processed, header_rows)
+        self.write_excel_content(ws, df_processed, summary, header_rows, plan)
+        self.apply_styles(ws, plan)
+        wb.save(output_filepath)
+
+    def row_plan(self, df_processed, header_rows):
+        """对账单各行的用途和数据行的样式标记"""
+        return RowPlan(len(header_rows), _negative_cells(df_processed, len(self.expected_headers)))
+
+    def write_excel_content(self, ws, df_processed, summary, header_rows, plan):
+        """写入Excel内容，合计和对账周期取自分组汇总"""
+        # 写入表头
+        for row in header_rows + [self.expected_headers]:
+            ws.append(row)
+        
+        # 写入数据行（包括已处理的退货负数数据）
+        for i, row in enumerate(df_processed.values.tolist()):
+            ws.append(row)
+        
+        # 添加合计行
+        self.add_total_row(ws, summary, plan.total_row)
+        
+        # 填入固定文字、供应商名称、对账周期和合计数据
+        for coordinate, value in self.summary_cells(df_processed, summary).items():
+            ws[coordinate] = value
+        
+        # 设置单元格对齐方式
+        # A3A4右对齐
+        ws['A3'].alignment = Alignment(horizontal="right", vertical="center")
+        ws['A4'].alignment = Alignment(horizontal="right", vertical="center")
+        
+        # B3B4左对齐
+        ws['B3'].alignment = Alignment(horizontal="left", vertical="center")
+        ws['B4'].alignment = Alignment(horizontal="left", vertical="center")
+        
+        # C3C4C5右对齐
+        ws['C3'].alignment = Alignment(horizontal="right", vertical="center")
+        ws['C4'].alignment = Alignment(horizontal="right", vertical="center")
+        ws['C5'].alignment = Alignment(horizontal="right", vertical="center")
+        
+        # D3D4D5左对齐
+        ws['D3'].alignment = Alignment(horizontal="left", vertical="center")
+        ws['D4'].alignment = Alignment(horizontal="left", vertical="center")
+        ws['D5'].alignment = Alignment(horizontal="left", vertical="center")
+        
+        # 隐藏L列和M列
+        ws.column_dimensions['L'].hidden = True
+        ws.column_dimensions['M'].hidden = True
+    
+
+    
+    def summary_cells(self, df_processed, summary):
+        """表头区域第3-5行的固定文字和数据，返回{单元格坐标: 值}"""
+        cells = {
+            'A3': '供应商名称：',
+            'A4': '对账周期：',
+            'C3': '小计金额(结算)：',
+            'C4': '税额(结算)：',
+            'C5': '小计价税(结算)：',
+        }
+        
+        # 填入数据
+        supplier_name = df_processed['供应商/备用金报销账户'].iloc[0] if not df_processed.empty else ''
+        cells['B3'] = supplier_name
+        
+        # 提取年月并格式化为日期范围
+        min_date = summary['最早收货日期']
+        if pd.notna(min_date):
+            year = min_date.year
+            month = min_date.month
+            # 获取该月的最后一天
+            last_day = calendar.monthrange(year, month)[1]
+            # 格式化为"YYYY-MM-01 - YYYY-MM-31"格式
+            cells['B4'] = f"{year}-{month:02d}-01 至 {year}-{month:02d}-{last_day:02d}"
+        
+        # 填入合计数据（退货金额在整理数据时已转换为负数）
+        cells['D3'] = money.format_cents(summary['小计金额合计'])
+        cells['D4'] = money.format_cents(summary['税额合计'])
+        cells['D5'] = money.format_cents(summary['小计价税合计'])
+        return cells
+    
+    def total_row_values(self, summary):
+        """合计行的内容，返回{列名: 值}"""
+        return {
+            "单价(结算)": "合计",
+            "小计金额(结算)": money.format_cents(summary['小计金额合计']),
+            "税额(结算)": money.format_cents(summary['税额合计']),
+            "小计价税(结算)": money.format_cents(summary['小计价税合计'])
+        }
+    
+    def add_total_row(self, ws, summary, total_row):
+        """添加合计行"""
+        for col, value in self.total_row_values(summary).items():
+            cell = ws.cell(row=total_row, column=self.expected_headers.index(col) + 1, value=value)
+            # 为数字列应用会计格式
+            if col in TOTAL_AMOUNT_HEADERS:
+                cell.number_format = ACCOUNTING_FORMAT
+                # 设置右对齐
+                cell.alignment = Alignment(horizontal='right', vertical='center')
+        
+    def apply_styles(self, ws, plan):
+        """应用样式到工作表"""
+        # 1. 批量设置页面属性
+        self._apply_page_settings(ws)
+        
+        # 2. 批量设置列宽（使用缓存）
+        self._apply_column_widths(ws)
+        
+        # 3. 注册命名样式，单元格按名称引用
+        STATEMENT_STYLES.register(ws.parent)
+        self._apply_cell_styles_optimized(ws, plan)
+        
+        # 4. 清理内存
+        gc.collect()
+        
+    def cell_style(self, row_num, col, plan):
+        """表头区域和合计行单元格的命名样式，数据行的样式由data_row_styles计算
+        
+        第7行（数据开始行）与表头行使用相同的样式，没有背景色，负数也不标红
+        """
+        if row_num <= HEADER_ZONE_ROWS:
+            if row_num == 2:  # 第二行下边框
+                return 'header-rule'
+            if row_num in [3, 4, 5]:  # 供应商名称、对账周期和合计右对齐
+                return 'header-info'
+            if row_num == 6:  # 表头行上下边框，F列到I列（单价、小计金额、税额、小计价税）右对齐
+                return 'header-columns-amount' if col in [6, 7, 8, 9] else 'header-columns'
+            return 'header'
+        
+        # 合计行：金额列使用会计格式并右对齐
+        even = '-even' if row_num % 2 == 0 else ''
+        if self.expected_headers[col - 1] in TOTAL_AMOUNT_HEADERS:
+            return 'totals-amount' + even
+        return 'totals' + even
+    
+    def data_row_styles(self, plan):
+        """数据行单元格的样式在DATA_ROW_STYLES中的序号（行数×列数）：
+        行中有负数时整行黄色背景（负数红色），否则偶数行浅灰色背景
+        """
+        shape = plan.negative.shape
+        return np.select([plan.negative,
+                          np.broadcast_to(plan.return_rows[:, None], shape),
+                          np.broadcast_to(plan.even_rows[:, None], shape)],
+                         [3, 2, 1], 0).astype(np.int8)
+
+    def iter_styled_rows(self, df_processed, summary, header_rows, plan):
+        """逐行写入时使用：按行号顺序产生(行号, 值列表, 样式列表)，样式为(命名样式, 覆盖的数字格式)
+
+        表头区域填入固定文字和汇总，合计行填入合计；每行的列数与对账单的列数相同
+        """
+        max_col = len(self.expected_headers)
+        fixed_cells = {}
+        for coordinate, value in self.summary_cells(df_processed, summary).items():
+            row_num, col = coordinate_to_tuple(coordinate)
+            fixed_cells.setdefault(row_num, {})[col] = value
+        total_values = {self.expected_headers.index(col) + 1: value
+                        for col, value in self.total_row_values(summary).items()}
+        data_styles = self.data_row_styles(plan)
+        data_keys = [(name, None) for name in DATA_ROW_STYLES]
+
+        rows = itertools.chain(header_rows, [self.expected_headers],
+                               df_processed.itertuples(index=False, name=None))
+        for row_num in range(1, plan.max_row + 1):
+            values = next(rows, ())
+            if plan.is_data_row(row_num):
+                yield row_num, values, [data_keys[index] for index in data_styles[row_num - plan.first_data_row].tolist()]
+                continue
+
+            values = list(values)[:max_col]
+            values += [None] * (max_col - len(values))
+            if row_num == plan.total_row:
+                for col, value in total_values.items():
+                    values[col - 1] = value
+            for col, value in fixed_cells.get(row_num, {}).items():
+                values[col - 1] = value
+            yield row_num, values, [(self.cell_style(row_num, col, plan), self.cell_number_format(row_num, col, plan))
+                                    for col in range(1, max_col + 1)]
+
+    def cell_number_format(self, row_num, col, plan):
+        """需要覆盖命名样式的数字格式：没有标题行时，小分组的合计行位于表头区域，金额列仍使用会计格式"""
+        if row_num == plan.total_row <= HEADER_ZONE_ROWS and self.expected_headers[col - 1] in TOTAL_AMOUNT_HEADERS:
+            return ACCOUNTING_FORMAT
+        return None
+
+    def _apply_page_settings(self, ws):
+        """批量应用页面设置"""
+        # 页面属性批量设置
+        ws.page_setup.paperSize = Worksheet.PAPERSIZE_A4
+        ws.page_setup.orientation = Worksheet.ORIENTATION_PORTRAIT
+        ws.page_setup.fitToWidth = 1
+        ws.page_setup.fitToHeight = 0
+        ws.page_setup.horizontalCentered = True
+        ws.page_setup.verticalCentered = False
+        ws.sheet_view.zoomScale = 80  # 设置页面缩放比例为80%
+            
+        ws.sheet_properties.pageSetUpPr.fitToPage = True
+        ws.print_title_rows = '1:6'
+        ws.freeze_panes = 'A7'
+        
+        # 页边距批量设置
+        margins = {'left': 0.31, 'right': 0.31, 'top': 0.31, 'bottom': 0.79, 'header': 0.31, 'footer': 0.31}
+        ws.page_margins = PageMargins(**{k: v * 0.3937 for k, v in margins.items()})
+        
+        # 页脚设置
+        ws.oddFooter.center.font = '微软雅黑'
+        ws.oddFooter.center.size = 11
+        ws.oddFooter.center.text = "Page &[Page] of &[Pages]"
+        
+    def _apply_column_widths(self, ws):
+        """批量应用列宽设置（使用缓存）"""
+        widths = COLUMN_WIDTHS
+        
+        # 使用生成器表达式优化内存使用
+        col_map = ((header, get_column_letter(idx))
+                   for idx, header in enumerate(self.expected_headers, 1))
+        
+        # 批量设置列宽
+        for header, col_letter in col_map:
+            if header in widths:
+                ws.column_dimensions[col_letter].width = widths[header]
+                
+    def _apply_cell_styles_optimized(self, ws, plan):
+        """按命名样式应用单元格样式，每行的用途和数据行的样式取自plan，不读取单元格的值"""
+        max_col = len(self.expected_headers)
+        data_styles = self.data_row_styles(plan)
+        
+        for row in ws.iter_rows(min_row=1, max_col=max_col, max_row=plan.max_row):
+            row_num = row[0].row
+            
+            if plan.is_data_row(row_num):
+                for cell, index in zip(row, data_styles[row_num - plan.first_data_row].tolist()):
+                    cell.style = DATA_ROW_STYLES[index]
+                continue
+            
+            for cell in row:
+                cell.style = self.cell_style(row_num, cell.column, plan)
+                number_format = self.cell_number_format(row_num, cell.column, plan)
+                if number_format:
+                    cell.number_format = number_format
+            
+            # 设置第一行、第二行和表头行的行高
+            if row_num in ROW_HEIGHTS:
+                ws.row_dimensions[row_num].height = ROW_HEIGHTS[row_num]
+
+
+class StreamingStatementWriter(StatementWriter):
+    """以write_only方式逐行写入对账单：每个单元格写入时就带有最终的样式，不需要再遍历一次工作表
+
+    内容和样式与StatementWriter相同；行写入文件后即释放，大对账单的内存占用不随行数增加。
+    页面设置、列宽、样式表等固定内容取自每个进程只生成一次的StatementTemplate
+    """
+
+    def write(self, df_processed, summary, header_rows, output_filepath):
+        """生成并保存一个对账单文件"""
+        template = statement_template(tuple(self.expected_headers))
+        wb, ws = template.new_workbook()
+        plan = self.row_plan(df_processed, header_rows)
+
+        styles = template.styles
+        for row_num, values, keys in self.iter_styled_rows(df_processed, summary, header_rows, plan):
+            ws.append([self._styled_cell(ws, value, styles[key]) for value, key in zip(values, keys)])
+
+        template.save(wb, output_filepath)
+
+    @staticmethod
+    def _styled_cell(ws, value, style_array):
+        """先写入值再设置样式，与openpyxl生成方式相同：日期等值自动设置的数字格式被单元格样式覆盖"""
+        cell = Cell(ws, row=1, column=1, value=value)
+        cell._style = style_array
+        return cell
+
+
+class StatementTemplate:
+    """write_only对账单的模板：页面设置、列宽、行高、命名样式和单元格样式只设置一次，
+    工作簿中除工作表以外的部分（样式表、主题、工作簿和文档属性等）只序列化一次
+
+    每个对账单的工作簿共用模板的设置和样式表，只写入各行的内容，保存时复制模板序列化后的其他部分
+    """
+
+    SHEET_PART = 'xl/worksheets/sheet1.xml'
+    # 工作簿的样式表：单元格样式和条件格式样式按序号引用其中的项目
+    STYLE_TABLES = ('_fonts', '_fills', '_borders', '_alignments', '_protections', '_number_formats', '_cell_styles')
+
+    def __init__(self, expected_headers):
+        writer = StatementWriter(expected_headers)
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Statement")
+
+        # write_only模式下页面设置、列宽和行高需要在写入对应的行之前设置；没有写入的行不使用行高
+        writer._apply_page_settings(ws)
+        writer._apply_column_widths(ws)
+        ws.column_dimensions['L'].hidden = True
+        ws.column_dimensions['M'].hidden = True
+        for row_num, height in ROW_HEIGHTS.items():
+            ws.row_dimensions[row_num].height = height
+
+        # 所有可能用到的单元格样式预先加入样式表，对账单中单元格的样式序号与模板的样式表一致
+        STATEMENT_STYLES.register(wb)
+        self.styles = {}
+        for name in STATEMENT_STYLES.styles:
+            for number_format in (None, ACCOUNTING_FORMAT):
+                cell = WriteOnlyCell(ws)
+                cell.style = name
+                if number_format:
+                    cell.number_format = number_format
+                wb._cell_styles.add(cell._style)
+                self.styles[(name, number_format)] = cell._style
+
+        self.style_counts = self._style_counts(wb)
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        with zipfile.ZipFile(buffer) as archive:
+            self.parts = [(name, archive.read(name)) for name in archive.namelist()]
+        self.workbook = wb
+        self.worksheet = ws
+
+    def new_workbook(self):
+        """复制模板：新的工作簿使用模板样式表的副本，工作表使用模板的页面设置、列宽和行高（只读，不会被修改）"""
+        wb = Workbook(write_only=True)
+        for name in self.STYLE_TABLES:
+            setattr(wb, name, IndexedList(getattr(self.workbook, name)))
+        wb._named_styles = NamedStyleList(self.workbook._named_styles)
+        wb._differential_styles = DifferentialStyleList(dxf=list(self.workbook._differential_styles.dxf))
+        ws = wb.create_sheet("Statement")
+        for attribute in ('sheet_properties', 'sheet_format', 'views', 'column_dimensions', 'row_dimensions',
+                          'print_options', 'page_margins', 'page_setup', 'HeaderFooter', 'print_title_rows'):
+            setattr(ws, attribute, getattr(self.worksheet, attribute))
+        return wb, ws
+
+    def save(self, wb, output_filepath):
+        """保存对账单：工作表单独生成，其他部分使用模板序列化后的内容
+
+        写入时样式表增加了模板中没有的项目（如新的数字格式）时，模板序列化的样式表与单元格的样式序号不一致，
+        改为按普通方式保存整个工作簿
+        """
+        ws = wb.worksheets[0]
+        ws.close()
+        if self._style_counts(wb) != self.style_counts:
+            wb.save(output_filepath)
+            return
+        try:
+            with zipfile.ZipFile(output_filepath, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+                for name, data in self.parts:
+                    if name == self.SHEET_PART:
+                        archive.write(ws._writer.out, name)
+                    else:
+                        archive.writestr(name, data)
+        finally:
+            ws._writer.cleanup()
+
+
+    @classmethod
+    def _style_counts(cls, wb):
+        """工作簿样式表中各类项目的数量"""
+        return (tuple(len(getattr(wb, name)) for name in cls.STYLE_TABLES)
+                + (len(wb._named_styles), len(wb._differential_styles.dxf)))
+
+
+@functools.lru_cache(maxsize=None)
+def statement_template(expected_headers):
+    """每个进程中按对账单的列创建一次模板（子进程收到的是生成器的副本，模板不随任务传递）"""
+    return StatementTemplate(expected_headers)
+
+
+class XlsxStatementWriter(StatementWriter):
+    """以xlsxwriter的constant_memory方式逐行写入对账单，不需要openpyxl
+
+    内容、样式和页面设置与StatementWriter相同，命名样式转换为xlsxwriter的单元格格式；
+    每行写入后即写到临时文件，内存占用不随行数增加。需要安装xlsxwriter
+    """
+
+    available = HAS_XLSXWRITER
+
+    def write(self, df_processed, summary, header_rows, output_filepath):
+        """生成并保存一个对账单文件"""
+        wb = xlsxwriter.Workbook(output_filepath, {'constant_memory': True, 'strings_to_urls': False})
+        try:
+            ws = wb.add_worksheet("Statement")
+            plan = self.row_plan(df_processed, header_rows)
+            self._apply_xlsx_page_settings(ws)
+
+            # 列宽和隐藏的L列、M列
+            for col, header in enumerate(self.expected_headers):
+                width = COLUMN_WIDTHS.get(header)
+                hidden = get_column_letter(col + 1) in ('L', 'M')
+                if width is not None or hidden:
+                    ws.set_column(col, col, _xlsx_column_width(width), None, {'hidden': hidden})
+            for row_num, height in ROW_HEIGHTS.items():
+                if row_num <= plan.max_row:
+                    ws.set_row(row_num - 1, height)
+
+            def cell_format(name, number_format):
+                """命名样式对应的单元格格式，同一样式的单元格共用"""
+                properties = STATEMENT_STYLES.xlsxwriter_properties(name)
+                if number_format:
+                    properties['num_format'] = number_format
+                return wb.add_format(properties)
+
+            formats = _StyleCache(cell_format)
+            for row_num, values, keys in self.iter_styled_rows(df_processed, summary, header_rows, plan):
+                for col, (value, key) in enumerate(zip(values, keys)):
+                    ws.write(row_num - 1, col, value, formats[key])
+        finally:
+            wb.close()
+
+    def _apply_xlsx_page_settings(self, ws):
+        """页面设置，与_apply_page_settings写入文件的设置相同（page_setup上的水平居中设置openpyxl不写入文件，这里也不设置）"""
+        ws.set_paper(9)  # A4
+        ws.set_portrait()
+        ws.fit_to_pages(1, 0)
+        ws.set_zoom(80)
+        ws.repeat_rows(0, 5)  # 打印标题1:6
+        ws.freeze_panes(6, 0)  # A7
+        inch = 0.3937
+        ws.set_margins(left=0.31 * inch, right=0.31 * inch, top=0.31 * inch, bottom=0.79 * inch)
+        ws.set_header('', {'margin': 0.31 * inch})
+        ws.set_footer('&C&"微软雅黑"&11 Page &P of &N', {'margin': 0.31 * inch})
+
+
+# 对账单生成方式：openpyxl为先写入再统一设置样式，write_only为逐行写入带样式的单元格（速度快、内存占用小），
+# xlsxwriter为使用xlsxwriter逐行写入（需要安装xlsxwriter）
+WRITER_BACKENDS = {
+    'openpyxl': StatementWriter,
+    'write_only': StreamingStatementWriter,
+    'xlsxwriter': XlsxStatementWriter,
+}
+DEFAULT_WRITER_BACKEND = 'write_only'
+
+
+def available_writer_backends():
+    """返回当前环境中可以使用的对账单生成方式"""
+    return [name for name, writer_class in WRITER_BACKENDS.items() if writer_class.available]
+
+
+def create_writer(backend, expected_headers):
+    """按生成方式创建对账单生成器"""
+    if backend not in WRITER_BACKENDS:
+        raise ValueError(f"未知的对账单生成方式：{backend}")
+    if not WRITER_BACKENDS[backend].available:
+        raise ValueError(f"对账单生成方式 {backend} 不可用")
+    return WRITER_BACKENDS[backend](expected_headers)
+
+
+def _is_negative(value):
+    """单元格的值是否为负数"""
+    return isinstance(value, (int, float)) and value < 0
+
+
+class _StyleCache(dict):
+    """(命名样式, 数字格式) -> 写入方式对应的样式对象，第一次使用时创建"""
+
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+
+    def __missing__(self, key):
+        value = self[key] = self.factory(*key)
+        return value
+
+
+def _xlsx_column_width(width):
+    """openpyxl的列宽换算为xlsxwriter的列宽：xlsxwriter按显示的字符数计算，写入文件时另加5像素的边距"""
+    if width is None:
+        return None
+    return width - 5 / 7
+
+
+def _negative_cells(df_processed, max_col):
+    """分组数据中的负数单元格，返回行数×列数的布尔数组
+
+    按列推断类型：数值列整列比较，文字、日期等列没有负数，只有混合了文字和数字的列（如金额中的空值）逐个判断
+    """
+    negative = np.zeros((len(df_processed), max_col), dtype=bool)
+    # 对账单数据的各列都是object类型，整体转换为数组后按列取值，不逐列创建Series
+    table = df_processed.to_numpy()
+    for i in range(min(max_col, table.shape[1])):
+        values = table[:, i]
+        kind = pd.api.types.infer_dtype(values, skipna=False)
+        if kind in _NUMERIC_KINDS:
+            negative[:, i] = values.astype('float64') < 0
+        elif kind not in _NON_NUMERIC_KINDS:
+            negative[:, i] = [_is_negative(value) for value in values]
+    return negative
+
+
+def write_statement(writer, df_processed, summary, header_rows, output_filepath):
+    """子进程的入口：生成一个对账单文件"""
+    writer.write(df_processed, summary, header_rows, output_filepath)
+
+
+def write_statements(writer, tasks, workers=1):
+    """生成多个对账单，tasks为(标记, 分组数据, 汇总, 标题行, 文件路径)的迭代器
+
+    按任务顺序产生(标记, 文件路径, 错误信息)，成功时错误信息为None；标记由调用方使用，不传给子进程。
+    多进程时同时提交的任务数有上限，任务迭代器按需取用，内存占用不随分组数增加
+    """
+    if workers <= 1:
+        for tag, df_processed, summary, header_rows, output_filepath in tasks:
+            try:
+                writer.write(df_processed, summary, header_rows, output_filepath)
+                yield tag, output_filepath, None
+            except Exception as e:
+                yield tag, output_filepath, str(e)
+        return
+
+    # 使用spawn方式启动子进程，Windows和打包后的程序行为一致
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    pending = collections.deque()
+    try:
+        for tag, df_processed, summary, header_rows, output_filepath in tasks:
+            future = pool.submit(write_statement, writer, df_processed, summary, header_rows, output_filepath)
+            pending.append((tag, output_filepath, future))
+            if len(pending) >= workers * 2:
+                yield _task_result(*pending.popleft())
+        while pending:
+            yield _task_result(*pending.popleft())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _task_result(tag, output_filepath, future):
+    """等待一个任务完成，返回(标记, 文件路径, 错误信息)"""
+    try:
+        future.result()
+        return tag, output_filepath, None
+    except Exception as e:
+        return tag, output_filepath, str(e)
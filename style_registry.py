@@ -0,0 +1,64 @@
+from openpyxl.styles import NamedStyle
+
+# openpyxl的边框样式 -> xlsxwriter的边框序号
+_XLSX_BORDER_STYLES = {
+    'thin': 1, 'medium': 2, 'dashed': 3, 'dotted': 4, 'thick': 5, 'double': 6, 'hair': 7,
+    'mediumDashed': 8, 'dashDot': 9, 'mediumDashDot': 10, 'dashDotDot': 11, 'mediumDashDotDot': 12, 'slantDashDot': 13,
+}
+
+
+class StyleRegistry:
+    """工作簿级的命名样式表
+
+    样式对象在模块加载时创建一次，每个工作簿注册一次命名样式，单元格按名称引用；
+    相同样式的单元格共用一条样式记录，不再为每个单元格创建字体、边框等对象
+    """
+
+    def __init__(self, styles):
+        # 样式名称 -> NamedStyle的参数（font、fill、border、alignment、number_format）
+        self.styles = dict(styles)
+
+    def register(self, wb):
+        """把所有命名样式注册到工作簿，工作簿中已有同名样式时跳过"""
+        registered = set(wb.named_styles)
+        for name, attributes in self.styles.items():
+            if name not in registered:
+                wb.add_named_style(NamedStyle(name=name, **attributes))
+
+    def xlsxwriter_properties(self, name):
+        """命名样式转换为xlsxwriter的格式属性（字体、对齐、边框、背景色和数字格式）"""
+        attributes = self.styles[name]
+        properties = {}
+        font = attributes.get('font')
+        if font is not None:
+            properties.update(font_name=font.name, font_size=font.sz, bold=bool(font.b), italic=bool(font.i))
+            if font.color is not None:
+                properties['font_color'] = _xlsx_color(font.color)
+        alignment = attributes.get('alignment')
+        if alignment is not None:
+            if alignment.horizontal:
+                properties['align'] = alignment.horizontal
+            if alignment.vertical:
+                properties['valign'] = 'vcenter' if alignment.vertical == 'center' else alignment.vertical
+            if alignment.wrap_text:
+                properties['text_wrap'] = True
+        border = attributes.get('border')
+        if border is not None:
+            for side_name in ('left', 'right', 'top', 'bottom'):
+                side = getattr(border, side_name)
+                if side is not None and side.style:
+                    properties[side_name] = _XLSX_BORDER_STYLES[side.style]
+                    if side.color is not None:
+                        properties[f'{side_name}_color'] = _xlsx_color(side.color)
+        fill = attributes.get('fill')
+        if fill is not None and fill.fill_type == 'solid':
+            # xlsxwriter的实心填充使用bg_color作为前景色
+            properties.update(pattern=1, bg_color=_xlsx_color(fill.fgColor))
+        if attributes.get('number_format'):
+            properties['num_format'] = attributes['number_format']
+        return properties
+
+
+def _xlsx_color(color):
+    """openpyxl的ARGB颜色转换为xlsxwriter的#RRGGBB"""
+    return '#' + color.rgb[-6:]
@@ -0,0 +1,73 @@
+import os
+import sys
+import datetime
+import pytest
+from openpyxl import Workbook
+
+# 测试直接导入仓库根目录下的模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 导出文件的表头：对账单列、排除的N-Q列、退货列和其他不需要的列
+EXPORT_HEADERS = [
+    "收货日期", "订单号", "商品名称", "实收数量", "基本单位",
+    "单价(结算)", "小计金额(结算)", "税额(结算)", "小计价税(结算)", "部门",
+    "税率", "供应商/备用金报销账户", "商品分类",
+    "单价(含税)", "采购单价", "采购金额", "采购税额",
+    "退货", "合计退货数量", "退货合计金额(结算)", "退货合计税额(结算)", "退货合计价税(结算)",
+    "备注", "收货人",
+]
+
+
+def export_rows():
+    """两个供应商、两种税率的收货明细，包含退货、整数金额、空白部门和空白单位"""
+    rows = []
+    for i in range(60):
+        supplier = "供应商A" if i % 3 else "供应商B"
+        rate = 0.13 if i % 2 else 0.09
+        price = 12.5 if i % 4 else 100
+        quantity = i % 5 + 1
+        amount = round(price * quantity, 2)
+        tax = round(amount * rate, 2)
+        is_return = i % 7 == 3
+        rows.append([
+            datetime.datetime(2024, 5, i % 28 + 1, 9, 30), f"SO{i:06d}", f"商品{i % 6}", quantity,
+            None if i % 11 == 5 else "kg", price, amount, tax, round(amount + tax, 2),
+            None if i % 9 == 4 else ("员工餐厅" if i % 2 else "中餐厅"), rate, supplier, "蔬菜" if i % 3 else "酒水",
+            price, price, amount, tax,
+            "是" if is_return else "否", quantity if is_return else 0, amount if is_return else 0,
+            tax if is_return else 0, round(amount + tax, 2) if is_return else 0,
+            None, "张三",
+        ])
+    return rows
+
+
+def write_export(path, rows):
+    """写入收货单导出文件：表头前有标题行，与系统导出的格式相同"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "收货单商品明细"
+    ws.append(["收货单商品明细"])
+    ws.append([])
+    ws.append(["导出时间", "2024-06-01"])
+    ws.append(["门店", "测试酒店"])
+    ws.append(EXPORT_HEADERS)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def export_file(tmp_path):
+    """生成一个小的收货单导出文件"""
+    return write_export(tmp_path / "收货单.xlsx", export_rows())
+
+
+@pytest.fixture
+def dated_export_file(tmp_path):
+    """订单号列中部分单元格为日期时间的导出文件（对账单中这些单元格使用日期格式）"""
+    rows = export_rows()
+    for i, row in enumerate(rows):
+        if i % 4 == 1:
+            row[1] = datetime.datetime(2024, 5, i % 28 + 1, 8, 15)
+    return write_export(tmp_path / "收货单.xlsx", rows)
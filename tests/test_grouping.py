@@ -0,0 +1,39 @@
+import pandas as pd
+import grouping
+
+
+def make_receipts(departments):
+    return pd.DataFrame({
+        '收货日期': pd.to_datetime(['2024-05-01'] * len(departments)),
+        '税率': [0.13] * len(departments),
+        '供应商/备用金报销账户': pd.Series(['供应商A'] * len(departments), dtype='category'),
+        '部门': pd.Series(departments, dtype='category'),
+        '小计金额(结算)': pd.array([100 * (i + 1) for i in range(len(departments))], dtype='Int64'),
+    })
+
+
+def test_blank_department_forms_its_own_group():
+    key_columns = grouping.GROUP_MODES['按供应商和部门'][0]
+    df = grouping.add_group_columns(make_receipts(['中餐厅', None, '西餐厅']), key_columns)
+    df, groups = grouping.split_groups(df, key_columns)
+
+    keys = [key for key, _ in groups]
+    assert ('供应商A', '无部门') in keys
+    # 每一行都属于某个分组，合计不少算
+    assert sum(rows.stop - rows.start for _, rows in groups) == 3
+    assert sum(int(df['小计金额(结算)'].iloc[rows].sum()) for _, rows in groups) == 600
+    # 部门列保持导出时的内容，只有分组列中记为"无部门"
+    blank_rows = dict(groups)[('供应商A', '无部门')]
+    assert df['部门'].iloc[blank_rows].isna().all()
+
+
+def test_blank_department_file_name():
+    key_columns, filename_template, _ = grouping.GROUP_MODES['按供应商和部门']
+    assert grouping.build_filename(filename_template, '2024-05', key_columns, ('供应商A', '无部门')) == '2024-05_供应商A_无部门.xlsx'
+    assert grouping.describe_group(key_columns, ('供应商A', '无部门')) == '供应商A (部门: 无部门)'
+
+
+def test_department_key_only_added_when_grouping_by_department():
+    df = make_receipts(['中餐厅', None])
+    key_columns = grouping.GROUP_MODES['按供应商'][0]
+    assert list(grouping.add_group_columns(df, key_columns).columns) == list(df.columns)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import money
+from header_schema import apply_column_types
+
+
+def test_to_cents_rounds_half_up():
+    cents = money.to_cents([1.005, 2.675, -0.015, 0.004, 3067.39])
+    assert cents.tolist() == [101, 268, -2, 0, 306739]
+    assert cents.dtype == 'Int64'
+
+
+def test_to_cents_scales_whole_yuan_integers():
+    cents = money.to_cents(pd.Series([100, 13, -113], dtype='int64'))
+    assert cents.tolist() == [10000, 1300, -11300]
+
+
+def test_invalid_values_become_missing():
+    cents = money.to_cents(pd.Series([np.nan, '无', None, '12.5'], dtype=object))
+    assert cents.isna().tolist() == [True, True, True, False]
+    assert cents.iloc[3] == 1250
+
+
+def test_is_cents_only_accepts_converted_columns():
+    assert money.is_cents(money.to_cents([1.0]))
+    assert not money.is_cents(pd.Series([100], dtype='int64'))
+    assert not money.is_cents(pd.Series([1.5]))
+
+
+def test_apply_column_types_converts_whole_yuan_once():
+    df = pd.DataFrame({'小计金额(结算)': [100], '税额(结算)': [13], '小计价税(结算)': [113]})
+    df = apply_column_types(df)
+    assert df.iloc[0].tolist() == [10000, 1300, 11300]
+    # 已经是整数分的数据（如合并、缓存后）再次应用时不变
+    assert apply_column_types(df.copy()).iloc[0].tolist() == [10000, 1300, 11300]
+
+
+def test_conversions_back_to_yuan():
+    assert money.format_cents(-5) == '-0.05'
+    assert money.format_cents(306739) == '3067.39'
+    assert str(money.cents_to_decimal(101)) == '1.01'
+    assert money.yuan_to_cents(1.005) == 101
+    assert money.cents_to_yuan(pd.Series([101, None], dtype='Int64')).tolist()[0] == 1.01
@@ -0,0 +1,41 @@
+"""各读取引擎得到的数据与第一个可用引擎相同，分批读取与一次读取相同"""
+import pandas as pd
+import pytest
+import excel_reader
+from header_schema import HeaderSchema, RETURN_COLUMNS
+
+STATEMENT_HEADERS = [
+    "收货日期", "订单号", "商品名称", "实收数量", "基本单位",
+    "单价(结算)", "小计金额(结算)", "税额(结算)", "小计价税(结算)", "部门",
+    "税率", "供应商/备用金报销账户", "商品分类",
+]
+# 与界面相同的表头结构：对账单列为必需列，退货列为可选列，N-Q列不参与匹配
+HEADER_SCHEMA = HeaderSchema(STATEMENT_HEADERS, optional=RETURN_COLUMNS, excluded_positions=range(13, 17))
+ENGINES = excel_reader.available_engines()
+
+
+@pytest.mark.parametrize('engine', ENGINES[1:])
+def test_engine_matches_first_engine(export_file, engine):
+    expected_header_row, expected_map, expected = excel_reader.load_excel(export_file, HEADER_SCHEMA, engine=ENGINES[0])
+    header_row, column_map, actual = excel_reader.load_excel(export_file, HEADER_SCHEMA, engine=engine)
+
+    assert (header_row, column_map) == (expected_header_row, expected_map)
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_chunks_match_single_read(export_file, engine):
+    _, _, expected = excel_reader.load_excel(export_file, HEADER_SCHEMA, engine=engine)
+    _, _, chunks = excel_reader.iter_excel_chunks(export_file, HEADER_SCHEMA, chunk_rows=7, engine=engine)
+
+    chunks = list(chunks)
+    assert len(chunks) > 1
+    actual = pd.concat(chunks, ignore_index=True)
+    # 各分块单独推断类型（如整数列），按一次读取的类型比较值
+    pd.testing.assert_frame_equal(actual.astype(expected.dtypes.to_dict()), expected)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_read_excel_matches_pandas(export_file, engine):
+    expected = pd.read_excel(export_file, header=4)
+    pd.testing.assert_frame_equal(excel_reader.read_excel(export_file, 4, engine=engine), expected)
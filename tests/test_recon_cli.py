@@ -0,0 +1,31 @@
+import json
+import recon_cli
+
+
+def test_expand_inputs_reports_unmatched_patterns(tmp_path):
+    (tmp_path / "a.xlsx").touch()
+    (tmp_path / "b.xlsx").touch()
+    missing = str(tmp_path / "missing.xlsx")
+    files, unmatched = recon_cli.expand_inputs([str(tmp_path / "*.xlsx"), str(tmp_path / "a.xlsx"), missing,
+                                                str(tmp_path / "*.xls")])
+    assert files == [str(tmp_path / "a.xlsx"), str(tmp_path / "b.xlsx")]
+    assert unmatched == [missing, str(tmp_path / "*.xls")]
+
+
+def test_no_matching_inputs_exit_with_usage_error(tmp_path, capsys):
+    missing = str(tmp_path / "missing.xlsx")
+    assert recon_cli.main([missing, '-q']) == recon_cli.EXIT_USAGE
+    assert json.loads(capsys.readouterr().out)['unmatched_inputs'] == [missing]
+
+
+def test_unmatched_input_fails_the_run(export_file, tmp_path, capsys):
+    missing = str(tmp_path / "missing.xlsx")
+    code = recon_cli.main([export_file, missing, '-o', str(tmp_path / 'export'), '--cache', str(tmp_path / 'cache'),
+                           '--no-archive', '-w', '1'])
+    captured = capsys.readouterr()
+    summary = json.loads(captured.out)
+
+    assert code == recon_cli.EXIT_FAILED
+    assert (summary['status'], summary['inputs_unmatched'], summary['unmatched_inputs']) == ('failed', 1, [missing])
+    assert summary['statements_written'] == 2
+    assert missing in captured.err
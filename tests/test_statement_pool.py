@@ -0,0 +1,46 @@
+"""多进程生成的对账单与单进程生成的内容相同"""
+import zipfile
+import datetime
+import pandas as pd
+from statement_writer import StatementWriter, write_statements
+
+STATEMENT_HEADERS = [
+    "收货日期", "订单号", "商品名称", "实收数量", "基本单位",
+    "单价(结算)", "小计金额(结算)", "税额(结算)", "小计价税(结算)", "部门",
+    "税率", "供应商/备用金报销账户", "商品分类",
+]
+
+
+def statement_tasks(folder):
+    """三个供应商的对账单任务"""
+    tasks = []
+    for n, supplier in enumerate(["供应商A", "供应商B", "供应商C"]):
+        rows = [[f"2024-05-{i + 1:02d}", f"SO{n}{i:04d}", f"商品{i}", i + 1, "kg", 12.5, 12.5 * (i + 1),
+                 round(12.5 * (i + 1) * 0.13, 2), round(12.5 * (i + 1) * 1.13, 2), "中餐厅", "13%", supplier, "蔬菜"]
+                for i in range(10 + n)]
+        df_processed = pd.DataFrame(rows, columns=STATEMENT_HEADERS)
+        summary = {'最早收货日期': datetime.datetime(2024, 5, 1), '小计金额合计': 68750 + n,
+                   '税额合计': 8938, '小计价税合计': 77688 + n}
+        header_rows = [["收货单对账单"], [], [], [], []]
+        tasks.append((supplier, df_processed, summary, header_rows, str(folder / f"{supplier}.xlsx")))
+    return tasks
+
+
+def workbook_parts(path):
+    """工作簿中除文档属性（含保存时间）外的各部分内容"""
+    with zipfile.ZipFile(path) as archive:
+        return {name: archive.read(name) for name in archive.namelist() if name != 'docProps/core.xml'}
+
+
+def test_pool_matches_serial(tmp_path):
+    writer = StatementWriter(STATEMENT_HEADERS)
+    (tmp_path / "serial").mkdir()
+    (tmp_path / "pool").mkdir()
+    serial = list(write_statements(writer, statement_tasks(tmp_path / "serial"), workers=1))
+    pool = list(write_statements(writer, statement_tasks(tmp_path / "pool"), workers=2))
+
+    assert [error for _, _, error in serial + pool] == [None] * 6
+    # 结果按任务顺序返回
+    assert [tag for tag, _, _ in pool] == [tag for tag, _, _ in serial]
+    for (_, serial_path, _), (_, pool_path, _) in zip(serial, pool):
+        assert workbook_parts(pool_path) == workbook_parts(serial_path)
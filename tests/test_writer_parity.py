@@ -0,0 +1,135 @@
+"""各对账单生成方式与openpyxl生成方式的输出逐个单元格比较
+
+比较值、数字格式、字体、边框、背景色和对齐方式，以及列宽、隐藏列、行高和页面设置
+"""
+import os
+import datetime
+import pytest
+from openpyxl import load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+from statement_pipeline import EXPECTED_HEADERS, StatementConfig, StatementPipeline
+from statement_writer import available_writer_backends, statement_template
+
+REFERENCE_BACKEND = 'openpyxl'
+BACKENDS = [name for name in available_writer_backends() if name != REFERENCE_BACKEND]
+
+
+def rgb(color):
+    """颜色只比较RGB：不同的库写入的透明度（00和FF）在Excel中显示相同"""
+    if color is None or not isinstance(color.rgb, str):
+        return None
+    return color.rgb[-6:]
+
+
+def side_signature(side):
+    if side is None or not side.style:
+        return None
+    return side.style, rgb(side.color)
+
+
+def cell_signature(cell):
+    font, fill, border, alignment = cell.font, cell.fill, cell.border, cell.alignment
+    fill_color = rgb(fill.fgColor) if fill.fill_type == 'solid' else None
+    return (cell.value, cell.number_format, font.name, font.sz, bool(font.b), bool(font.i), rgb(font.color), fill_color,
+            tuple(side_signature(getattr(border, side)) for side in ('left', 'right', 'top', 'bottom')),
+            alignment.horizontal, alignment.vertical, bool(alignment.wrap_text))
+
+
+def sheet_signature(ws):
+    """工作表中单元格、列、行和页面设置的比较内容"""
+    cells = {}
+    for row in ws.iter_rows():
+        for cell in row:
+            cells[cell.coordinate] = cell_signature(cell)
+    # 未写入的单元格与空白单元格相同
+    blank = cell_signature(ws.cell(ws.max_row + 100, 1))
+    cells = {coordinate: signature for coordinate, signature in cells.items() if signature != blank}
+
+    # 一条列记录可以包含多列（min-max），按列展开
+    columns = {}
+    for dimension in ws.column_dimensions.values():
+        if dimension.width or dimension.hidden:
+            for col in range(dimension.min or 1, (dimension.max or dimension.min or 1) + 1):
+                columns[get_column_letter(col)] = (dimension.width, bool(dimension.hidden))
+    rows = {row: dimension.height for row, dimension in ws.row_dimensions.items() if dimension.height}
+
+    page_setup, margins = ws.page_setup, ws.page_margins
+    page = (page_setup.paperSize, page_setup.orientation, page_setup.fitToWidth or 1, page_setup.fitToHeight,
+            ws.sheet_properties.pageSetUpPr.fitToPage if ws.sheet_properties.pageSetUpPr else None,
+            str(ws.print_title_rows), ws.freeze_panes, ws.sheet_view.zoomScale, ws.oddFooter.center.text,
+            tuple(round(getattr(margins, side), 4) for side in ('left', 'right', 'top', 'bottom', 'header', 'footer')),
+            sorted(str(cell_range) for cell_range in ws.merged_cells.ranges))
+    return cells, columns, rows, page
+
+
+def generate_statements(export_file, output_folder, writer_backend, config_file, group_mode='按供应商和税率'):
+    config = StatementConfig(group_mode=group_mode, workers=1, output_folder=output_folder, archive_folder=None,
+                             cache_folder=os.path.join(output_folder, 'cache'), config_file=config_file,
+                             writer_backend=writer_backend)
+    stats = StatementPipeline(config, log=lambda message: None).run([export_file])
+    assert stats['files_failed'] == 0 and stats['statements_failed'] == 0
+    month_folder = os.path.join(output_folder, '2024-05')
+    return {name: os.path.join(month_folder, name) for name in sorted(os.listdir(month_folder)) if name.endswith('.xlsx')}
+
+
+def repo_config_file():
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.txt')
+
+
+def assert_statements_match(expected, actual):
+    assert list(actual) == list(expected)
+    for name, expected_path in expected.items():
+        expected_wb, actual_wb = load_workbook(expected_path), load_workbook(actual[name])
+        assert actual_wb.sheetnames == expected_wb.sheetnames
+        for (part, want), got in zip(zip(('cells', 'columns', 'rows', 'page'), sheet_signature(expected_wb.active)),
+                                     sheet_signature(actual_wb.active)):
+            if isinstance(want, dict):
+                differences = {key: (want.get(key), got.get(key)) for key in set(want) | set(got) if want.get(key) != got.get(key)}
+                assert not differences, f"{name} {part}: {sorted(differences.items())[:3]}"
+            else:
+                assert got == want, f"{name} {part}"
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('with_title_rows', [True, False], ids=['config', 'no-config'])
+def test_backend_matches_openpyxl(export_file, tmp_path, backend, with_title_rows):
+    config_file = repo_config_file() if with_title_rows else str(tmp_path / 'missing_config.txt')
+    expected = generate_statements(export_file, str(tmp_path / REFERENCE_BACKEND), REFERENCE_BACKEND, config_file)
+    actual = generate_statements(export_file, str(tmp_path / backend), backend, config_file)
+
+    assert len(expected) == 4
+    assert_statements_match(expected, actual)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_date_cells_match_openpyxl(dated_export_file, tmp_path, backend):
+    """数据中有日期时间时，写入的单元格带有预先设置的样式以外的数字格式，各生成方式仍与openpyxl相同"""
+    config_file = repo_config_file()
+    expected = generate_statements(dated_export_file, str(tmp_path / REFERENCE_BACKEND), REFERENCE_BACKEND, config_file)
+    actual = generate_statements(dated_export_file, str(tmp_path / backend), backend, config_file)
+
+    reference = load_workbook(next(iter(expected.values()))).active
+    order_numbers = [value for value, in reference.iter_rows(min_row=8, min_col=2, max_col=2, values_only=True)]
+    assert any(isinstance(value, (int, float)) for value in order_numbers)
+    assert_statements_match(expected, actual)
+
+
+def test_template_saves_styles_added_while_writing(tmp_path):
+    """写入时增加了模板样式表中没有的样式，按普通方式保存，单元格的样式仍然正确；模板的样式表不变"""
+    template = statement_template(tuple(EXPECTED_HEADERS))
+    wb, ws = template.new_workbook()
+    cell = WriteOnlyCell(ws, value=datetime.datetime(2024, 5, 1, 8, 15))
+    cell.font = Font(name='宋体', size=9)
+    ws.append([cell, 1.5])
+    path = tmp_path / 'statement.xlsx'
+    template.save(wb, path)
+
+    saved = load_workbook(path).active
+    assert saved['A1'].number_format == 'yyyy-mm-dd h:mm:ss'
+    assert (saved['A1'].font.name, saved['A1'].font.sz) == ('宋体', 9)
+    assert saved['B1'].number_format == 'General'
+    assert saved.print_title_rows == '$1:$6'
+    assert template._style_counts(template.workbook) == template.style_counts
+
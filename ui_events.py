@@ -0,0 +1,70 @@
+import queue
+from tkinter import TclError
+
+# 界面刷新间隔（毫秒）：每次刷新处理队列中的事件，进度条约每秒更新10次
+DRAIN_INTERVAL_MS = 100
+# 每次刷新最多处理的事件数，日志很多时分批显示，不阻塞界面
+MAX_EVENTS_PER_DRAIN = 1000
+
+
+class UIEventBus:
+    """工作线程与Tk主线程之间的事件队列
+
+    工作线程不直接操作控件，只把日志、进度和需要在主线程执行的操作（对话框、恢复按钮状态等）放入队列；
+    主线程用after定时取出，日志批量显示，进度只显示最新的值
+    """
+
+    def __init__(self, widget, on_log, on_progress, interval=DRAIN_INTERVAL_MS):
+        self.widget = widget
+        self.on_log = on_log  # 在主线程中显示一批日志，参数为[(消息, 标签)]
+        self.on_progress = on_progress  # 在主线程中更新进度条
+        self.interval = interval
+        self.events = queue.Queue()
+        self.latest_progress = None
+        self.shown_progress = None
+        self.widget.after(self.interval, self.drain)
+
+    def log(self, message, tag=None):
+        """添加一条日志，tag为None时由on_log决定显示样式"""
+        self.events.put(('log', (message, tag)))
+
+    def progress(self, value):
+        """记录最新的进度，两次刷新之间的多次更新只显示最后一次"""
+        self.latest_progress = value
+
+    def call(self, func, *args):
+        """在主线程中按顺序执行func，之前放入的日志和进度先显示"""
+        self.events.put(('call', (func, args)))
+
+    def drain(self):
+        """取出队列中的事件并更新界面，控件已销毁时停止"""
+        try:
+            if not self.widget.winfo_exists():
+                return
+        except TclError:
+            return
+        messages = []
+        try:
+            for _ in range(MAX_EVENTS_PER_DRAIN):
+                kind, payload = self.events.get_nowait()
+                if kind == 'log':
+                    messages.append(payload)
+                    continue
+                self.flush(messages)
+                messages = []
+                func, args = payload
+                func(*args)
+        except queue.Empty:
+            pass
+        finally:
+            self.flush(messages)
+            self.widget.after(self.interval, self.drain)
+
+    def flush(self, messages):
+        """显示一批日志和最新的进度"""
+        if messages:
+            self.on_log(messages)
+        progress = self.latest_progress
+        if progress is not None and progress != self.shown_progress:
+            self.shown_progress = progress
+            self.on_progress(progress)